@@ -7,6 +7,7 @@ from groq import Groq
 from settings import config
 from services.location_tool import LocationFinder
 from services.weather_service import WeatherService
+from services.usage_log import record_usage
 from core.state import ConversationState
 
 logger = logging.getLogger("NeuroWeather")
@@ -95,10 +96,30 @@ class WeatherAssistant:
             logger.info(f"Executing Record Search: {record_type}")
             return WeatherService.find_all_time_record(coords, record_type)
 
+        if hist_type and intent.get("count_from"):
+            try:
+                first = datetime.strptime(intent["count_from"], "%Y-%m-%d").date()
+                last = datetime.strptime(intent["count_to"], "%Y-%m-%d").date() if intent.get("count_to") else None
+            except ValueError:
+                logger.error(f"Invalid count period from LLM: {intent.get('count_from')} - {intent.get('count_to')}")
+            else:
+                logger.info(f"Executing Historical Event Count: {hist_type} ({first} to {last or 'today'})")
+                return WeatherService.count_event_occurrences(coords, hist_type, first, last)
+
         if hist_type:
             logger.info(f"Executing Historical Event Search: {hist_type}")
             return WeatherService.find_historical_event(coords, hist_type)
 
+        if intent.get("date_from") and intent.get("date_to"):
+            try:
+                date_from = datetime.strptime(intent["date_from"], "%Y-%m-%d").date()
+                date_to = datetime.strptime(intent["date_to"], "%Y-%m-%d").date()
+            except ValueError:
+                logger.error(f"Invalid date range from LLM: {intent['date_from']} - {intent['date_to']}")
+            else:
+                logger.info(f"Executing Range Report: {date_from} to {date_to}")
+                return WeatherService.get_range_report(coords, date_from, date_to)
+
         logger.info(f"Executing Standard Report: {query_date}")
         return WeatherService.get_weather_context(coords, query_date)
 
@@ -118,6 +139,7 @@ class WeatherAssistant:
             return "I could not identify the city. Please specify the location."
 
         self.state.update(city_name, coords, query_date)
+        record_usage(city_name, coords)
 
         # 3. Data Retrieval
         context_data = self._fetch_weather_data(intent, coords, query_date)
@@ -0,0 +1,165 @@
+import json
+import logging
+import os
+import threading
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+from typing import Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger("NeuroWeather")
+
+_DTYPE = np.dtype("<f4")
+_ROW_BYTES = _DTYPE.itemsize
+
+
+class ArchiveStore:
+    """Persistent per-location columnar store of settled daily archive data.
+
+    Every location gets a directory holding `meta.json` (the first day of
+    each column) and one raw float32 file per daily variable, where row i is
+    day `start + i`. Columns grow and shrink independently, at the head or
+    the tail, so a column's coverage is its start plus its file length.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def location_key(city_coords: Sequence[float]) -> str:
+        return f"{city_coords[0]:.4f}_{city_coords[1]:.4f}"
+
+    def _dir(self, city_coords: Sequence[float]) -> str:
+        return os.path.join(self.root, self.location_key(city_coords))
+
+    def _column_path(self, city_coords: Sequence[float], column: str) -> str:
+        return os.path.join(self._dir(city_coords), f"{column}.f32")
+
+    def _read_starts(self, city_coords: Sequence[float]) -> Dict[str, date]:
+        try:
+            with open(os.path.join(self._dir(city_coords), "meta.json"), encoding="utf-8") as fh:
+                meta = json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+        try:
+            return {column: date.fromisoformat(day) for column, day in meta["columns"].items()}
+        except (ValueError, KeyError, AttributeError, TypeError):
+            return {}
+
+    def _write_starts(self, city_coords: Sequence[float], starts: Dict[str, date]) -> None:
+        os.makedirs(self._dir(city_coords), exist_ok=True)
+        path = os.path.join(self._dir(city_coords), "meta.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as fh:
+            json.dump({"columns": {column: day.isoformat() for column, day in starts.items()}}, fh)
+        os.replace(f"{path}.tmp", path)
+
+    def _rows(self, city_coords: Sequence[float], column: str) -> int:
+        try:
+            return os.path.getsize(self._column_path(city_coords, column)) // _ROW_BYTES
+        except OSError:
+            return 0
+
+    def coverage(self, city_coords: Sequence[float], columns: Sequence[str]) -> Optional[Tuple[date, date]]:
+        """Returns the (first, last) day stored for all of `columns`, or None."""
+        with self._lock:
+            starts = self._read_starts(city_coords)
+            first, last = None, None
+            for column in columns:
+                rows = self._rows(city_coords, column)
+                if column not in starts or rows == 0:
+                    return None
+                column_last = starts[column] + timedelta(days=rows - 1)
+                first = starts[column] if first is None else max(first, starts[column])
+                last = column_last if last is None else min(last, column_last)
+
+            if first is None or first > last:
+                return None
+            return first, last
+
+    def read(self, city_coords: Sequence[float], start: date, end: date, columns: Sequence[str]) -> pd.DataFrame:
+        """Reads [start, end] for `columns`; the range must lie within `coverage()`."""
+        with self._lock:
+            starts = self._read_starts(city_coords)
+            count = (end - start).days + 1
+
+            data: Dict[str, np.ndarray] = {}
+            for column in columns:
+                first = (start - starts[column]).days
+                values = np.memmap(
+                    self._column_path(city_coords, column), dtype=_DTYPE, mode="r",
+                    offset=first * _ROW_BYTES, shape=(count,)
+                )
+                data[column] = np.array(values)
+                del values
+
+        data["date"] = pd.date_range(start=pd.Timestamp(start, tz="UTC"), periods=count, freq="D")
+        return pd.DataFrame(data=data)
+
+    def write(self, city_coords: Sequence[float], frame: pd.DataFrame, columns: Sequence[str]) -> None:
+        """Merges a contiguous daily frame into the store, column by column.
+
+        Rows extending a column at its tail are appended; rows before its
+        first day are prepended. Frames that would leave a gap in a column
+        are ignored for that column.
+        """
+        if frame.empty:
+            return
+
+        frame_start = pd.Timestamp(frame["date"].iloc[0]).date()
+
+        with self._lock:
+            starts = self._read_starts(city_coords)
+            changed = False
+
+            for column in columns:
+                incoming = frame[column].to_numpy(dtype=_DTYPE)
+                stored = self._rows(city_coords, column)
+                origin = starts.get(column) if stored else None
+
+                if origin is None:
+                    os.makedirs(self._dir(city_coords), exist_ok=True)
+                    self._replace(city_coords, column, incoming)
+                    starts[column] = frame_start
+                    changed = True
+                elif frame_start < origin:
+                    if self._prepend(city_coords, column, (origin - frame_start).days, incoming, stored):
+                        starts[column] = frame_start
+                        changed = True
+                else:
+                    self._append(city_coords, column, (frame_start - origin).days, incoming, stored)
+
+            if changed:
+                self._write_starts(city_coords, starts)
+
+    def _append(self, city_coords: Sequence[float], column: str, offset: int, incoming: np.ndarray, stored: int) -> None:
+        if offset > stored:
+            logger.debug(f"Archive store: skipping {column}, frame would leave a gap.")
+            return
+        values = incoming[stored - offset:]
+        if len(values):
+            with open(self._column_path(city_coords, column), "ab") as fh:
+                fh.write(values.tobytes())
+
+    def _prepend(
+            self,
+            city_coords: Sequence[float],
+            column: str,
+            shift: int,
+            incoming: np.ndarray,
+            stored: int
+    ) -> bool:
+        if shift > len(incoming):
+            logger.debug(f"Archive store: skipping {column}, frame would leave a gap before the stored range.")
+            return False
+
+        existing = np.fromfile(self._column_path(city_coords, column), dtype=_DTYPE)
+        # Keep stored rows; only the new head (and any tail beyond the store) comes from the frame
+        self._replace(city_coords, column, np.concatenate([incoming[:shift], existing, incoming[shift + stored:]]))
+        return True
+
+    def _replace(self, city_coords: Sequence[float], column: str, values: np.ndarray) -> None:
+        path = self._column_path(city_coords, column)
+        values.tofile(f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
@@ -0,0 +1,344 @@
+import asyncio
+import logging
+import aiohttp
+import pandas as pd
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+from aiohttp_client_cache import CachedSession, SQLiteBackend
+from openmeteo_sdk.WeatherApiResponse import WeatherApiResponse
+from settings import config
+from data.grid import canonical_coords
+from data.single_flight import AsyncSingleFlight, request_key
+from data.cache_policy import expire_after
+from data.data_getter import (
+    frame_cache, swr_stats, _decode_daily, _decode_hourly, _forecast_request, _select_columns,
+    _column_field, _frame_key, _project, _has_columns, _merge_into_cache, _register_window,
+    _from_covering_window, _align_to_blocks, _slice_days, _plan_store_fetches, _assemble_from_store
+)
+
+logger = logging.getLogger("NeuroWeather")
+
+# Same retry policy as retry_requests: these statuses and connection errors are retried
+RETRY_STATUSES = (500, 502, 504)
+
+# Identical concurrent requests within the event loop share one upstream fetch
+inflight = AsyncSingleFlight()
+
+# Background refreshes of forecasts served stale; references keep the tasks alive
+_refresh_tasks: Set[asyncio.Task] = set()
+_refreshing: Set[Tuple] = set()
+
+_session: Optional[CachedSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_session() -> CachedSession:
+    """Returns the pooled, cached HTTP session bound to the running event loop."""
+    global _session, _session_loop
+
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        _session = CachedSession(
+            cache=SQLiteBackend(config.ASYNC_CACHE_NAME, expire_after=config.CACHE_EXPIRE_AFTER),
+            connector=aiohttp.TCPConnector(limit=config.ASYNC_POOL_SIZE),
+            timeout=aiohttp.ClientTimeout(total=config.ASYNC_REQUEST_TIMEOUT)
+        )
+        _session_loop = loop
+    return _session
+
+
+async def close_session() -> None:
+    """Closes the pooled session (call on application shutdown)."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+def _encode_params(params: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """Flattens list parameters into repeated keys, like `requests` does."""
+    query = []
+    for key, value in params.items():
+        for item in (value if isinstance(value, (list, tuple)) else [value]):
+            query.append((key, str(item)))
+    query.append(("format", "flatbuffers"))
+    return query
+
+
+def _parse_flatbuffers(data: bytes) -> List[WeatherApiResponse]:
+    """Splits a length-prefixed Open-Meteo FlatBuffer payload into responses."""
+    responses = []
+    pos = 0
+    while pos < len(data):
+        length = int.from_bytes(data[pos:pos + 4], byteorder="little")
+        responses.append(WeatherApiResponse.GetRootAs(data, pos + 4))
+        pos += length + 4
+    return responses
+
+
+async def _weather_api(url: str, params: Dict[str, Any], ttl: Optional[int] = None) -> List[WeatherApiResponse]:
+    """Async counterpart of `openmeteo.weather_api` with cache and retries.
+
+    Args:
+        url: Endpoint URL.
+        params: Query parameters.
+        ttl: Cache lifetime for this response; defaults to the policy for the request.
+
+    Raises:
+        RuntimeError: If the API rejects the request or all retries fail.
+    """
+    session = _get_session()
+    query = _encode_params(params)
+    ttl = expire_after(url, params) if ttl is None else ttl
+
+    for attempt in range(config.RETRY_COUNT + 1):
+        # urllib3 backoff: no delay before the first retry, then factor * 2^(n - 1)
+        delay = config.RETRY_BACKOFF * (2 ** attempt) if attempt else 0.0
+        try:
+            async with session.get(url, params=query, expire_after=ttl) as response:
+                if response.status in RETRY_STATUSES and attempt < config.RETRY_COUNT:
+                    await asyncio.sleep(delay)
+                    continue
+                if response.status in (400, 429):
+                    raise RuntimeError(f"failed to request {url!r}: {await response.text()}")
+                response.raise_for_status()
+                return _parse_flatbuffers(await response.read())
+
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            if attempt == config.RETRY_COUNT:
+                raise RuntimeError(f"failed to request {url!r}: {e}") from e
+            await asyncio.sleep(delay)
+
+    raise RuntimeError(f"failed to request {url!r}: retries exhausted")
+
+
+async def _download_frame(
+        url: str,
+        params: Dict[str, Any],
+        decode: Callable[[Any, Sequence[str]], pd.DataFrame]
+) -> pd.DataFrame:
+    key = _frame_key(url, params)
+    columns = list(params[_column_field(params)])
+
+    async def fetch() -> pd.DataFrame:
+        ttl = expire_after(url, params)
+        response = await _weather_api(url, params, ttl)
+        frame = _merge_into_cache(key, decode(response[0], columns), ttl)
+        _register_window(url, params, frame)
+        return frame
+
+    frame, _ = await inflight.do(request_key(url, params), fetch)
+    return frame
+
+
+def _refresh_in_background(
+        url: str,
+        params: Dict[str, Any],
+        decode: Callable[[Any, Sequence[str]], pd.DataFrame]
+) -> None:
+    """Schedules one background re-download of a stale entry on the running loop."""
+    key = request_key(url, params)
+    if key in _refreshing:
+        return
+    _refreshing.add(key)
+
+    async def refresh() -> None:
+        try:
+            await _download_frame(url, params, decode)
+            swr_stats["refreshes"] += 1
+        except Exception as e:
+            swr_stats["refresh_failures"] += 1
+            logger.warning(f"Background refresh failed for {url}: {e}")
+        finally:
+            _refreshing.discard(key)
+
+    task = asyncio.create_task(refresh())
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+async def _fetch_frame(
+        url: str,
+        params: Dict[str, Any],
+        decode: Callable[[Any, Sequence[str]], pd.DataFrame]
+) -> pd.DataFrame:
+    """Async counterpart of `data_getter._fetch_frame`, sharing its frame cache, merging and staleness rules."""
+    key = _frame_key(url, params)
+    field = _column_field(params)
+    needed = list(params[field])
+    swr = config.SWR_ENABLED and url == config.OPEN_METEO_FORECAST_URL
+
+    cached, stale = frame_cache.lookup(key, max_stale=config.SWR_MAX_STALENESS if swr else 0)
+    if _has_columns(cached, needed):
+        if stale:
+            refresh_columns = [column for column in cached.columns if column != "date"]
+            _refresh_in_background(url, {**params, field: refresh_columns}, decode)
+        return _project(cached, needed)
+
+    covering = _from_covering_window(url, params, needed)
+    if covering is not None:
+        return covering
+
+    missing = needed if cached is None or stale else [column for column in needed if column not in cached.columns]
+
+    try:
+        frame = await _download_frame(url, {**params, field: missing}, decode)
+    except Exception as e:
+        fallback = frame_cache.lookup(key, max_stale=config.SWR_STALE_IF_ERROR)[0] if swr else None
+        if not _has_columns(fallback, needed):
+            raise
+        swr_stats["stale_on_error"] += 1
+        logger.warning(f"Upstream failed, serving stale forecast: {e}")
+        return _project(fallback, needed)
+
+    return _project(frame, needed)
+
+
+async def get_hourly_forecast_async(
+        city_coords: List[float],
+        forecast_days: int = 3,
+        variables: Optional[Sequence[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+) -> pd.DataFrame:
+    """Async version of `data_getter.get_hourly_forecast`.
+
+    Args:
+        city_coords: A list containing [latitude, longitude].
+        forecast_days: Number of days to forecast (1-16), ignored when a date window is given.
+        variables: Subset of HOURLY_VARIABLES to download (default: all).
+        start_date: Optional window start YYYY-MM-DD (local date of the location).
+        end_date: Optional window end YYYY-MM-DD, inclusive.
+
+    Returns:
+        pd.DataFrame: DataFrame containing hourly weather variables.
+                      Returns empty DataFrame on API failure.
+
+    Raises:
+        ValueError: If city_coords, variables or the date window are invalid.
+    """
+    params = _forecast_request(city_coords, "hourly", variables, forecast_days, start_date, end_date)
+
+    try:
+        return await _fetch_frame(config.OPEN_METEO_FORECAST_URL, params, _decode_hourly)
+
+    except Exception:
+        return pd.DataFrame()
+
+
+async def get_daily_forecast_async(
+        city_coords: List[float],
+        start_date: str,
+        end_date: str,
+        variables: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
+    """Async version of `data_getter.get_daily_forecast`.
+
+    Args:
+        city_coords: A list containing [latitude, longitude].
+        start_date: String YYYY-MM-DD (local date of the location).
+        end_date: String YYYY-MM-DD, inclusive.
+        variables: Subset of DAILY_FORECAST_VARIABLES to download (default: all).
+
+    Returns:
+        pd.DataFrame: One row per day; empty DataFrame on API failure.
+
+    Raises:
+        ValueError: If city_coords, variables or the date window are invalid.
+    """
+    params = _forecast_request(city_coords, "daily", variables, config.FORECAST_HORIZON_DAYS, start_date, end_date)
+
+    try:
+        return await _fetch_frame(config.OPEN_METEO_FORECAST_URL, params, _decode_daily)
+
+    except Exception:
+        return pd.DataFrame()
+
+
+async def _fetch_historical_async(
+        start_date: str,
+        end_date: str,
+        coords: List[float],
+        columns: List[str]
+) -> Union[pd.DataFrame, Dict[str, Any]]:
+    params = {
+        "latitude": coords[0],
+        "longitude": coords[1],
+        "start_date": start_date,
+        "end_date": end_date,
+        "daily": columns
+    }
+
+    try:
+        return await _fetch_frame(config.OPEN_METEO_ARCHIVE_URL, params, _decode_daily)
+
+    except Exception as e:
+        return {"error": True, "reason": str(e)}
+
+
+async def _fetch_historical_block_async(
+        start: date,
+        end: date,
+        coords: List[float],
+        columns: List[str]
+) -> Union[pd.DataFrame, Dict[str, Any]]:
+    """Async counterpart of `data_getter._fetch_historical_block`."""
+    if end < start:
+        return await _fetch_historical_async(str(start), str(end), coords, columns)
+
+    first, last = _align_to_blocks(start, end)
+    frame = await _fetch_historical_async(str(first), str(last), coords, columns)
+    return frame if isinstance(frame, dict) else _slice_days(frame, start, end)
+
+
+async def get_historical_weather_data_async(
+        start_date: str,
+        end_date: str,
+        city_coords: List[float],
+        variables: Optional[Sequence[str]] = None
+) -> Union[pd.DataFrame, Dict[str, Any]]:
+    """Async version of `data_getter.get_historical_weather_data`.
+
+    Uses the same local archive store; missing head and tail ranges are downloaded
+    concurrently. Store reads and writes run in worker threads, off the event loop.
+
+    Args:
+        start_date: String YYYY-MM-DD.
+        end_date: String YYYY-MM-DD.
+        city_coords: [latitude, longitude].
+        variables: Subset of DAILY_VARIABLES to download (default: all).
+
+    Returns:
+        Union[pd.DataFrame, Dict[str, Any]]: DataFrame with weather data or Dict with error info.
+
+    Raises:
+        ValueError: If a variable is unknown.
+    """
+    columns = _select_columns(variables, config.DAILY_VARIABLES)
+    coords = canonical_coords(city_coords, config.OPEN_METEO_ARCHIVE_URL)
+
+    try:
+        start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    except ValueError as e:
+        return {"error": True, "reason": str(e)}
+
+    if not config.ARCHIVE_STORE_ENABLED:
+        return await _fetch_historical_block_async(start, end, coords, columns)
+
+    try:
+        ranges = await asyncio.to_thread(_plan_store_fetches, start, end, coords, columns)
+        if ranges is None:
+            return await _fetch_historical_block_async(start, end, coords, columns)
+
+        fetched = await asyncio.gather(
+            *(_fetch_historical_async(str(first), str(last), coords, columns) for first, last in ranges)
+        )
+        for frame in fetched:
+            if isinstance(frame, dict):
+                return frame
+
+        return await asyncio.to_thread(_assemble_from_store, start, end, coords, list(fetched), columns)
+
+    except OSError as e:
+        logger.warning(f"Archive store unavailable, fetching directly: {e}")
+        return await _fetch_historical_block_async(start, end, coords, columns)
@@ -0,0 +1,47 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, Optional
+from settings import config
+
+# Same sentinel as requests_cache / aiohttp-client-cache
+NEVER_EXPIRE = -1
+
+
+def next_forecast_update(now: Optional[datetime] = None) -> datetime:
+    """Returns the next UTC time a new model run becomes available upstream."""
+    now = now or datetime.now(timezone.utc)
+    delay = timedelta(minutes=config.FORECAST_AVAILABILITY_DELAY_MINUTES)
+
+    # Runs from yesterday may still be pending publication today
+    for day_offset in (-1, 0, 1):
+        day = (now + timedelta(days=day_offset)).date()
+        for hour in sorted(config.FORECAST_MODEL_RUN_HOURS_UTC):
+            available = datetime.combine(day, time(hour), tzinfo=timezone.utc) + delay
+            if available > now:
+                return available
+
+    return now + timedelta(seconds=config.CACHE_EXPIRE_AFTER)
+
+
+def expire_after(url: str, params: Dict[str, Any], now: Optional[datetime] = None) -> int:
+    """Picks the cache lifetime (seconds, or NEVER_EXPIRE) for one API request.
+
+    - Archive ranges ending before the reanalysis lag are final and never expire.
+    - Archive ranges touching recent days expire after ARCHIVE_RECENT_TTL.
+    - Forecasts expire when the next model run is published.
+    - Anything else falls back to CACHE_EXPIRE_AFTER.
+    """
+    now = now or datetime.now(timezone.utc)
+
+    if url == config.OPEN_METEO_ARCHIVE_URL:
+        try:
+            end = date.fromisoformat(str(params["end_date"]))
+        except (KeyError, ValueError):
+            return config.CACHE_EXPIRE_AFTER
+        settled_end = now.date() - timedelta(days=config.ARCHIVE_SETTLED_LAG_DAYS)
+        return NEVER_EXPIRE if end <= settled_end else config.ARCHIVE_RECENT_TTL
+
+    if url == config.OPEN_METEO_FORECAST_URL:
+        seconds = int((next_forecast_update(now) - now).total_seconds())
+        return max(config.FORECAST_MIN_TTL, seconds)
+
+    return config.CACHE_EXPIRE_AFTER
@@ -1,106 +1,946 @@
+import calendar
+import logging
+import threading
 import pandas as pd
 import requests_cache
 import openmeteo_requests
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
 from retry_requests import retry
-from typing import List, Union, Dict, Any
+from typing import List, Union, Dict, Any, Callable, Hashable, Optional, Sequence, Set, Tuple
 from settings import config
+from data.grid import canonical_coords
+from data.archive_store import ArchiveStore
+from data.single_flight import SingleFlight, request_key
+from data.frame_cache import FrameCache
+from data.cache_policy import expire_after
+from data.demand import DemandTracker
+from data.rate_limit import RateLimiter
+
+logger = logging.getLogger("NeuroWeather")
+
+# (latitude, longitude)
+Location = Tuple[float, float]
 
 # Initialize API Client
 cache_session = requests_cache.CachedSession(config.CACHE_NAME, expire_after=config.CACHE_EXPIRE_AFTER)
 retry_session = retry(cache_session, retries=config.RETRY_COUNT, backoff_factor=config.RETRY_BACKOFF)
 openmeteo = openmeteo_requests.Client(session=retry_session)
 
+# Upstream traffic (cache hits excluded), counted on the response hook
+download_stats: Counter = Counter()
+
+
+def _count_download(response: Any, *args: Any, **kwargs: Any) -> Any:
+    if not getattr(response, "from_cache", False):
+        download_stats["requests"] += 1
+        download_stats["bytes"] += len(response.content or b"")
+    return response
+
+
+cache_session.hooks["response"].append(_count_download)
+
+# Optional token bucket taken before every upstream call (set by bulk jobs such as the cache warmer)
+_upstream_limiter: Optional[RateLimiter] = None
+
+
+def set_upstream_limiter(limiter: Optional[RateLimiter]) -> Optional[RateLimiter]:
+    """Throttles every upstream call in this process with `limiter` (None removes it).
+
+    Returns:
+        Optional[RateLimiter]: The previous limiter, so callers can restore it.
+    """
+    global _upstream_limiter
+    previous, _upstream_limiter = _upstream_limiter, limiter
+    return previous
+
+
+def _weather_api(url: str, params: Dict[str, Any], **kwargs: Any) -> List[Any]:
+    """`openmeteo.weather_api`, waiting for a token first when an upstream limiter is set."""
+    limiter = _upstream_limiter
+    if limiter is not None:
+        limiter.acquire()
+    return openmeteo.weather_api(url, params=params, **kwargs)
+
+# Local columnar store of settled archive days
+archive_store = ArchiveStore(config.ARCHIVE_STORE_DIR)
+
+# Identical concurrent requests share one upstream fetch
+inflight = SingleFlight()
+
+# Local day span of every cached forecast frame, per location and granularity,
+# so date-windowed requests can be cut out of a covering entry
+_forecast_windows: Dict[Tuple, Dict[Tuple, Tuple[date, date]]] = {}
+_window_locations: Dict[Tuple, Tuple] = {}
+_forecast_windows_lock = threading.Lock()
+window_stats: Counter = Counter()
+
+
+def _forget_window(key: Hashable) -> None:
+    """Drops the registered span of a frame that left the frame cache."""
+    with _forecast_windows_lock:
+        location = _window_locations.pop(key, None)
+        windows = _forecast_windows.get(location)
+        if windows is not None:
+            windows.pop(key, None)
+            if not windows:
+                del _forecast_windows[location]
+
+
+# Decoded frames, so repeated queries skip the SQLite read and FlatBuffer decoding
+frame_cache = FrameCache(
+    config.FRAME_CACHE_MAX_BYTES,
+    stale_retention=max(config.SWR_MAX_STALENESS, config.SWR_STALE_IF_ERROR) if config.SWR_ENABLED else 0,
+    on_remove=_forget_window
+)
+
+# Background refreshes of forecasts served stale
+_refresh_pool = ThreadPoolExecutor(max_workers=config.SWR_REFRESH_WORKERS, thread_name_prefix="swr-refresh")
+_refreshing: Set[Tuple] = set()
+_refreshing_lock = threading.Lock()
+swr_stats: Counter = Counter()
+
+# Forecast request frequency per (latitude, longitude, forecast_days, granularity) grid cell
+forecast_demand = DemandTracker(config.REFRESH_AHEAD_HALF_LIFE)
+
+
+def _decode_hourly(response: Any, variables: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Builds the hourly DataFrame from one Open-Meteo response.
+
+    Args:
+        response: Open-Meteo response.
+        variables: Columns in the order they were requested (default: HOURLY_VARIABLES).
+    """
+    hourly = response.Hourly()
+    variables = config.HOURLY_VARIABLES if variables is None else variables
+
+    hourly_data = {
+        "date": pd.date_range(
+            start=pd.to_datetime(hourly.Time(), unit="s", utc=True),
+            end=pd.to_datetime(hourly.TimeEnd(), unit="s", utc=True),
+            freq=pd.Timedelta(seconds=hourly.Interval()),
+            inclusive="left"
+        )
+    }
+
+    for i, var_name in enumerate(variables):
+        hourly_data[var_name] = hourly.Variables(i).ValuesAsNumpy()
+
+    frame = pd.DataFrame(data=hourly_data)
+    frame.attrs["utc_offset_seconds"] = response.UtcOffsetSeconds()
+    return frame
+
+
+def _decode_daily(response: Any, variables: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Builds the daily DataFrame from one Open-Meteo response.
+
+    Args:
+        response: Open-Meteo response.
+        variables: Columns in the order they were requested (default: DAILY_VARIABLES).
+    """
+    daily = response.Daily()
+    variables = config.DAILY_VARIABLES if variables is None else variables
+    daily_data = {}
+
+    for i, var_name in enumerate(variables):
+        daily_data[var_name] = daily.Variables(i).ValuesAsNumpy()
+
+    daily_data["date"] = pd.date_range(
+        start=pd.to_datetime(daily.Time(), unit="s", utc=True),
+        end=pd.to_datetime(daily.TimeEnd(), unit="s", utc=True),
+        freq=pd.Timedelta(seconds=daily.Interval()),
+        inclusive="left"
+    )
+
+    frame = pd.DataFrame(data=daily_data)
+    frame.attrs["utc_offset_seconds"] = response.UtcOffsetSeconds()
+    return frame
+
+
+def _select_columns(variables: Optional[Sequence[str]], available: List[str]) -> List[str]:
+    """Validates requested variables and puts them in configuration order (None selects all).
+
+    Raises:
+        ValueError: If a variable is not in `available`.
+    """
+    if variables is None:
+        return list(available)
+    unknown = set(variables) - set(available)
+    if unknown:
+        raise ValueError(f"Unknown weather variables: {sorted(unknown)}")
+    return [column for column in available if column in variables]
+
+
+def _column_field(params: Dict[str, Any]) -> str:
+    """Name of the query parameter listing the requested columns."""
+    return "hourly" if "hourly" in params else "daily"
+
+
+def _frame_key(url: str, params: Dict[str, Any]) -> Tuple:
+    """Frame cache identity of a request, independent of the columns asked for."""
+    field = _column_field(params)
+    return request_key(url, {name: value for name, value in params.items() if name != field})
+
+
+def _project(frame: pd.DataFrame, columns: Sequence[str]) -> pd.DataFrame:
+    """New frame with only `columns` (plus the date) of `frame`."""
+    return frame[[column for column in frame.columns if column == "date" or column in columns]]
+
+
+def _has_columns(frame: Optional[pd.DataFrame], columns: Sequence[str]) -> bool:
+    return frame is not None and set(columns) <= set(frame.columns)
+
+
+def _merged_layout(existing: pd.DataFrame, frame: pd.DataFrame) -> List[str]:
+    """Column order of a merged frame: variables in configuration order, date where the decoder puts it."""
+    present = set(existing.columns) | set(frame.columns)
+    if frame.columns[0] == "date":
+        return ["date"] + [column for column in config.HOURLY_VARIABLES if column in present]
+    daily = dict.fromkeys(config.DAILY_VARIABLES + config.DAILY_FORECAST_VARIABLES)
+    return [column for column in daily if column in present] + ["date"]
+
+
+def _merge_into_cache(key: Tuple, frame: pd.DataFrame, ttl: int) -> pd.DataFrame:
+    """Caches `frame`, keeping columns of a fresh entry for the same rows that it lacks.
+
+    The merged entry expires with the older of the two parts. The read and
+    the write happen under the cache lock, so concurrent merges of different
+    columns for the same key cannot drop each other's columns.
+    """
+    def combine(
+            existing: Optional[pd.DataFrame],
+            remaining: float,
+            frame: pd.DataFrame,
+            ttl: int
+    ) -> Tuple[pd.DataFrame, int]:
+        if existing is not None and existing["date"].equals(frame["date"]):
+            extra = [column for column in existing.columns if column not in frame.columns]
+            if extra:
+                frame = pd.concat([frame, existing[extra]], axis=1)[_merged_layout(existing, frame)]
+                if remaining != float("inf"):
+                    ttl = max(1, int(remaining if ttl < 0 else min(ttl, remaining)))
+        return frame, ttl
+
+    return frame_cache.merge(key, frame, ttl, combine)
+
+
+def _download_frame(
+        url: str,
+        params: Dict[str, Any],
+        decode: Callable[[Any, Sequence[str]], pd.DataFrame],
+        force_refresh: bool = False
+) -> pd.DataFrame:
+    """Downloads and decodes one request (shared with identical in-flight calls) and caches it.
+
+    With `force_refresh`, the HTTP cache is bypassed and overwritten as well.
+
+    Returns:
+        pd.DataFrame: The cached frame, which may hold more columns than requested.
+    """
+    key = _frame_key(url, params)
+    columns = list(params[_column_field(params)])
+
+    def fetch() -> pd.DataFrame:
+        ttl = expire_after(url, params)
+        response = _weather_api(url, params, expire_after=ttl, force_refresh=force_refresh)
+        frame = _merge_into_cache(key, decode(response[0], columns), ttl)
+        _register_window(url, params, frame)
+        return frame
+
+    frame, _ = inflight.do(request_key(url, params), fetch)
+    return frame
+
+
+# Parameters that select the forecast period rather than the location
+_WINDOW_FIELDS = ("forecast_days", "start_date", "end_date")
+
+
+def _window_location_key(url: str, params: Dict[str, Any]) -> Optional[Tuple]:
+    """Identity of a forecast request without its columns and period, or None for other endpoints."""
+    if url != config.OPEN_METEO_FORECAST_URL:
+        return None
+    field = _column_field(params)
+    rest = {name: value for name, value in params.items() if name != field and name not in _WINDOW_FIELDS}
+    return request_key(url, {**rest, "granularity": field})
+
+
+def _local_days(frame: pd.DataFrame) -> pd.Series:
+    """Calendar day of every row in the location's timezone."""
+    offset = pd.Timedelta(seconds=frame.attrs.get("utc_offset_seconds", 0))
+    return (frame["date"] + offset).dt.date
+
+
+def _register_window(url: str, params: Dict[str, Any], frame: pd.DataFrame) -> None:
+    location = _window_location_key(url, params)
+    if location is None or frame.empty:
+        return
+    days = _local_days(frame)
+    key = _frame_key(url, params)
+    with _forecast_windows_lock:
+        _forecast_windows.setdefault(location, {})[key] = (days.iloc[0], days.iloc[-1])
+        _window_locations[key] = location
+        keys = list(_forecast_windows[location])
+
+    # Expired spans of this location go now, as does this one if the cache
+    # declined the frame; evicted ones were already dropped by the cache
+    for other in keys:
+        if (frame_cache.expires_in(other) or 0) <= 0:
+            _forget_window(other)
+
+
+def _from_covering_window(url: str, params: Dict[str, Any], needed: List[str]) -> Optional[pd.DataFrame]:
+    """Cuts a date-windowed forecast out of a fresh cached frame spanning the window, if any."""
+    location = _window_location_key(url, params)
+    if location is None or "start_date" not in params:
+        return None
+    first, last = date.fromisoformat(params["start_date"]), date.fromisoformat(params["end_date"])
+
+    with _forecast_windows_lock:
+        spans = list(_forecast_windows.get(location, {}).items())
+
+    for key, (span_first, span_last) in spans:
+        if not (span_first <= first and last <= span_last):
+            continue
+        frame, _ = frame_cache.peek(key)
+        if frame is None:
+            _forget_window(key)
+            continue
+        if _has_columns(frame, needed):
+            window_stats["window_hits"] += 1
+            days = _local_days(frame)
+            return _project(frame[(days >= first) & (days <= last)], needed).reset_index(drop=True)
+
+    return None
+
+
+def _refresh_in_background(
+        url: str,
+        params: Dict[str, Any],
+        decode: Callable[[Any, Sequence[str]], pd.DataFrame]
+) -> None:
+    """Schedules one background re-download of a stale entry."""
+    key = request_key(url, params)
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def refresh() -> None:
+        try:
+            _download_frame(url, params, decode)
+            swr_stats["refreshes"] += 1
+        except Exception as e:
+            swr_stats["refresh_failures"] += 1
+            logger.warning(f"Background refresh failed for {url}: {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    _refresh_pool.submit(refresh)
+
+
+def _fetch_frame(
+        url: str,
+        params: Dict[str, Any],
+        decode: Callable[[Any, Sequence[str]], pd.DataFrame]
+) -> pd.DataFrame:
+    """Fetches and decodes one request through the in-memory frame cache.
+
+    Entries are shared by requests differing only in their columns: a cached
+    superset is projected, and missing columns are downloaded alone and
+    merged into the entry. Date-windowed forecasts are also cut out of any
+    fresh cached forecast spanning the window. Misses are shared with identical in-flight calls
+    and decoded once. With SWR_ENABLED, forecasts expired for less than
+    SWR_MAX_STALENESS are returned immediately while a background worker
+    refreshes them, and forecasts up to SWR_STALE_IF_ERROR old are served if
+    the upstream fails.
+
+    Raises:
+        Exception: Whatever the request or decoding raised, for every waiting caller.
+    """
+    field = _column_field(params)
+    needed = list(params[field])
+
+    served, missing = _from_cache(url, params, decode)
+    if served is not None:
+        return served
+
+    try:
+        frame = _download_frame(url, {**params, field: missing}, decode)
+    except Exception as e:
+        fallback = _stale_fallback(url, params, e)
+        if fallback is None:
+            raise
+        return fallback
+
+    # Projection builds a new frame; the cached object is never handed out
+    return _project(frame, needed)
+
+
+def _from_cache(
+        url: str,
+        params: Dict[str, Any],
+        decode: Callable[[Any, Sequence[str]], pd.DataFrame]
+) -> Tuple[Optional[pd.DataFrame], List[str]]:
+    """Serves a request from the frame cache without downloading, if it can.
+
+    Stale forecasts within SWR_MAX_STALENESS are served and refreshed in the
+    background, as in `_fetch_frame`.
+
+    Returns:
+        Tuple[Optional[pd.DataFrame], List[str]]: (frame, []) on a hit, or
+            (None, columns to download) on a miss.
+    """
+    key = _frame_key(url, params)
+    field = _column_field(params)
+    needed = list(params[field])
+    swr = config.SWR_ENABLED and url == config.OPEN_METEO_FORECAST_URL
+
+    cached, stale = frame_cache.lookup(key, max_stale=config.SWR_MAX_STALENESS if swr else 0)
+    if _has_columns(cached, needed):
+        if stale:
+            refresh_columns = [column for column in cached.columns if column != "date"]
+            _refresh_in_background(url, {**params, field: refresh_columns}, decode)
+        return _project(cached, needed), []
+
+    covering = _from_covering_window(url, params, needed)
+    if covering is not None:
+        return covering, []
+
+    missing = needed if cached is None or stale else [column for column in needed if column not in cached.columns]
+    return None, missing
+
+
+def _stale_fallback(url: str, params: Dict[str, Any], error: Exception) -> Optional[pd.DataFrame]:
+    """A forecast up to SWR_STALE_IF_ERROR old to serve after an upstream failure, or None."""
+    if not (config.SWR_ENABLED and url == config.OPEN_METEO_FORECAST_URL):
+        return None
+    needed = list(params[_column_field(params)])
+    fallback = frame_cache.lookup(_frame_key(url, params), max_stale=config.SWR_STALE_IF_ERROR)[0]
+    if not _has_columns(fallback, needed):
+        return None
+    swr_stats["stale_on_error"] += 1
+    logger.warning(f"Upstream failed, serving stale forecast: {error}")
+    return _project(fallback, needed)
+
+
+def _download_batch(
+        url: str,
+        requests: List[Dict[str, Any]],
+        decode: Callable[[Any, Sequence[str]], pd.DataFrame]
+) -> List[pd.DataFrame]:
+    """Downloads single-location requests differing only in their coordinates in one call.
+
+    Every decoded frame is cached under its single-location request, exactly
+    as `_download_frame` would, so batch and per-city queries share entries.
+    Identical in-flight batches are downloaded once.
+
+    Returns:
+        List[pd.DataFrame]: Projected frame per request, in order.
+    """
+    columns = list(requests[0][_column_field(requests[0])])
+    params = {
+        **requests[0],
+        "latitude": [request["latitude"] for request in requests],
+        "longitude": [request["longitude"] for request in requests]
+    }
+
+    def fetch() -> List[pd.DataFrame]:
+        ttl = expire_after(url, params)
+        responses = _weather_api(url, params, expire_after=ttl)
+        frames = []
+        for request, response in zip(requests, responses):
+            frame = _merge_into_cache(_frame_key(url, request), decode(response, columns), ttl)
+            _register_window(url, request, frame)
+            frames.append(frame)
+        return frames
+
+    frames, _ = inflight.do(request_key(url, params), fetch)
+    return [_project(frame, columns) for frame in frames]
+
+
+def get_coalescing_stats() -> Dict[str, int]:
+    """Counters of executed vs. coalesced upstream requests."""
+    return dict(inflight.stats)
+
+
+def get_download_stats() -> Dict[str, int]:
+    """Requests sent to Open-Meteo and bytes received (HTTP cache hits excluded)."""
+    return {"requests": download_stats["requests"], "bytes": download_stats["bytes"]}
+
+
+def get_frame_cache_stats() -> Dict[str, Any]:
+    """Hit ratio and memory held by the in-memory frame cache, plus stale-serving and window counters."""
+    return {**frame_cache.stats(), **swr_stats, **window_stats}
+
+
+def _unique_locations(coords_list: Sequence[Sequence[float]], url: str) -> Dict[Location, List[Location]]:
+    """Groups input coordinates by the canonical grid point they are fetched from."""
+    groups: Dict[Location, List[Location]] = {}
+    for city_coords in coords_list:
+        if not city_coords or len(city_coords) < 2:
+            raise ValueError("Invalid coordinates provided.")
+        canonical = tuple(canonical_coords(city_coords, url))
+        groups.setdefault(canonical, []).append((city_coords[0], city_coords[1]))
+    return groups
+
+
+def _forecast_params(
+        lat: float,
+        lon: float,
+        period: Union[int, Tuple[str, str]],
+        columns: Optional[List[str]] = None,
+        field: str = "hourly"
+) -> Dict[str, Any]:
+    """Forecast query for `period` days from today, or for a (start_date, end_date) window."""
+    default = config.HOURLY_VARIABLES if field == "hourly" else config.DAILY_FORECAST_VARIABLES
+    params = {
+        "latitude": lat,
+        "longitude": lon,
+        field: default if columns is None else columns,
+        "timezone": "auto"
+    }
+    if isinstance(period, tuple):
+        params["start_date"], params["end_date"] = period
+    else:
+        params["forecast_days"] = period
+    return params
 
-def get_hourly_forecast(city_coords: List[float], forecast_days: int = 3) -> pd.DataFrame:
+
+def _forecast_request(
+        city_coords: List[float],
+        field: str,
+        variables: Optional[Sequence[str]],
+        forecast_days: int,
+        start_date: Optional[str],
+        end_date: Optional[str]
+) -> Dict[str, Any]:
+    """Validates a forecast query, records its demand and builds its parameters.
+
+    Raises:
+        ValueError: If coordinates, variables or the date window are invalid.
+    """
+    if not city_coords or len(city_coords) < 2:
+        raise ValueError("Invalid coordinates provided.")
+
+    available = config.HOURLY_VARIABLES if field == "hourly" else config.DAILY_FORECAST_VARIABLES
+    columns = _select_columns(variables, available)
+    lat, lon = canonical_coords(city_coords, config.OPEN_METEO_FORECAST_URL)
+
+    if start_date or end_date:
+        first = date.fromisoformat(start_date or end_date)
+        last = date.fromisoformat(end_date or start_date)
+        if last < first:
+            raise ValueError("end_date is before start_date.")
+        period: Union[int, Tuple[str, str]] = (str(first), str(last))
+        # Windows are served from the full horizon, which refresh-ahead keeps fresh
+        forecast_demand.record((lat, lon, config.FORECAST_HORIZON_DAYS, field))
+    else:
+        period = forecast_days
+        forecast_demand.record((lat, lon, forecast_days, field))
+
+    return _forecast_params(lat, lon, period, columns, field)
+
+
+def get_hourly_forecast(
+        city_coords: List[float],
+        forecast_days: int = 3,
+        variables: Optional[Sequence[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+) -> pd.DataFrame:
     """Fetches hourly forecast data from Open-Meteo API.
 
     Args:
         city_coords: A list containing [latitude, longitude].
-        forecast_days: Number of days to forecast (1-16).
+        forecast_days: Number of days to forecast (1-16), ignored when a date window is given.
+        variables: Subset of HOURLY_VARIABLES to download (default: all).
+        start_date: Optional window start YYYY-MM-DD (local date of the location).
+        end_date: Optional window end YYYY-MM-DD, inclusive.
 
     Returns:
         pd.DataFrame: DataFrame containing hourly weather variables.
                       Returns empty DataFrame on API failure.
 
     Raises:
-        ValueError: If city_coords is invalid.
+        ValueError: If city_coords, variables or the date window are invalid.
     """
-    if not city_coords or len(city_coords) < 2:
-        raise ValueError("Invalid coordinates provided.")
+    params = _forecast_request(city_coords, "hourly", variables, forecast_days, start_date, end_date)
+
+    try:
+        return _fetch_frame(config.OPEN_METEO_FORECAST_URL, params, _decode_hourly)
+
+    except Exception:
+        return pd.DataFrame()
+
+
+def get_daily_forecast(
+        city_coords: List[float],
+        start_date: str,
+        end_date: str,
+        variables: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
+    """Fetches daily forecast aggregates (Open-Meteo `daily`) for a date window.
+
+    Args:
+        city_coords: A list containing [latitude, longitude].
+        start_date: String YYYY-MM-DD (local date of the location).
+        end_date: String YYYY-MM-DD, inclusive.
+        variables: Subset of DAILY_FORECAST_VARIABLES to download (default: all).
+
+    Returns:
+        pd.DataFrame: One row per day; empty DataFrame on API failure.
+
+    Raises:
+        ValueError: If city_coords, variables or the date window are invalid.
+    """
+    params = _forecast_request(city_coords, "daily", variables, config.FORECAST_HORIZON_DAYS, start_date, end_date)
+
+    try:
+        return _fetch_frame(config.OPEN_METEO_FORECAST_URL, params, _decode_daily)
 
+    except Exception:
+        return pd.DataFrame()
+
+
+def forecast_expires_in(grid_coords: Location, forecast_days: int, field: str = "hourly") -> Optional[float]:
+    """Seconds until the cached forecast for a grid point expires, or None if not cached."""
+    params = _forecast_params(*grid_coords, forecast_days, field=field)
+    return frame_cache.expires_in(_frame_key(config.OPEN_METEO_FORECAST_URL, params))
+
+
+def refresh_forecast(grid_coords: Location, forecast_days: int, field: str = "hourly") -> None:
+    """Re-downloads all forecast variables for a grid point, replacing them in every cache layer.
+
+    Raises:
+        Exception: Whatever the request or decoding raised.
+    """
+    params = _forecast_params(*grid_coords, forecast_days, field=field)
+    decode = _decode_hourly if field == "hourly" else _decode_daily
+    _download_frame(config.OPEN_METEO_FORECAST_URL, params, decode, force_refresh=True)
+
+
+def get_hourly_forecast_batch(
+        coords_list: Sequence[Sequence[float]],
+        forecast_days: int = 3
+) -> Dict[Location, pd.DataFrame]:
+    """Fetches hourly forecasts for many locations in a few chunked requests.
+
+    Locations sharing a grid cell are fetched once, and locations already in
+    the frame cache are not fetched at all. Downloaded frames are cached per
+    location, so later single-city queries reuse them; with SWR_ENABLED,
+    stale forecasts are served and refreshed like single-city ones.
+
+    Args:
+        coords_list: [latitude, longitude] pairs.
+        forecast_days: Number of days to forecast (1-16).
+
+    Returns:
+        Dict[Location, pd.DataFrame]: Hourly frame per input (lat, lon) tuple.
+                                      Empty DataFrame for locations whose request failed.
+
+    Raises:
+        ValueError: If any coordinates are invalid.
+    """
+    url = config.OPEN_METEO_FORECAST_URL
+    groups = _unique_locations(coords_list, url)
+    frames: Dict[Location, pd.DataFrame] = {}
+
+    to_fetch: List[Location] = []
+    for location in groups:
+        frame, _ = _from_cache(url, _forecast_params(*location, forecast_days), _decode_hourly)
+        if frame is None:
+            to_fetch.append(location)
+        else:
+            frames[location] = frame
+
+    for offset in range(0, len(to_fetch), config.BATCH_LOCATION_CHUNK_SIZE):
+        chunk = to_fetch[offset:offset + config.BATCH_LOCATION_CHUNK_SIZE]
+        requests = [_forecast_params(*location, forecast_days) for location in chunk]
+
+        try:
+            frames.update(zip(chunk, _download_batch(url, requests, _decode_hourly)))
+        except Exception as e:
+            logger.warning(f"Batch forecast request failed for {len(chunk)} locations: {e}")
+            for location, request in zip(chunk, requests):
+                fallback = _stale_fallback(url, request, e)
+                frames[location] = pd.DataFrame() if fallback is None else fallback
+
+    results: Dict[Location, pd.DataFrame] = {}
+    for location, originals in groups.items():
+        for original in originals:
+            results[original] = frames[location].copy()
+    return results
+
+
+def _fetch_historical(
+        start_date: str,
+        end_date: str,
+        coords: List[float],
+        columns: List[str]
+) -> Union[pd.DataFrame, Dict[str, Any]]:
+    """Downloads daily archive `columns` for already canonicalized coordinates."""
     params = {
-        "latitude": city_coords[0],
-        "longitude": city_coords[1],
-        "hourly": config.HOURLY_VARIABLES,
-        "timezone": "auto",
-        "forecast_days": forecast_days
+        "latitude": coords[0],
+        "longitude": coords[1],
+        "start_date": start_date,
+        "end_date": end_date,
+        "daily": columns
     }
 
     try:
-        responses = openmeteo.weather_api(config.OPEN_METEO_FORECAST_URL, params=params)
-        response = responses[0]
-
-        hourly = response.Hourly()
-
-        hourly_data = {
-            "date": pd.date_range(
-                start=pd.to_datetime(hourly.Time(), unit="s", utc=True),
-                end=pd.to_datetime(hourly.TimeEnd(), unit="s", utc=True),
-                freq=pd.Timedelta(seconds=hourly.Interval()),
-                inclusive="left"
-            )
-        }
+        return _fetch_frame(config.OPEN_METEO_ARCHIVE_URL, params, _decode_daily)
 
-        for i, var_name in enumerate(config.HOURLY_VARIABLES):
-            hourly_data[var_name] = hourly.Variables(i).ValuesAsNumpy()
+    except Exception as e:
+        return {"error": True, "reason": str(e)}
 
-        return pd.DataFrame(data=hourly_data)
 
-    except Exception:
-        return pd.DataFrame()
+def _align_to_blocks(first: date, last: date) -> Tuple[date, date]:
+    """Widens [first, last] to whole ARCHIVE_BLOCK periods ("day", "month" or "year"), never past today."""
+    if config.ARCHIVE_BLOCK == "year":
+        aligned_first, aligned_last = first.replace(month=1, day=1), last.replace(month=12, day=31)
+    elif config.ARCHIVE_BLOCK == "month":
+        aligned_first = first.replace(day=1)
+        aligned_last = last.replace(day=calendar.monthrange(last.year, last.month)[1])
+    else:
+        aligned_first, aligned_last = first, last
+    return aligned_first, max(last, min(aligned_last, date.today()))
+
+
+def _slice_days(frame: pd.DataFrame, first: date, last: date) -> pd.DataFrame:
+    days = frame["date"].dt.date
+    return frame[(days >= first) & (days <= last)].reset_index(drop=True)
+
+
+def _fetch_historical_block(
+        start: date,
+        end: date,
+        coords: List[float],
+        columns: List[str]
+) -> Union[pd.DataFrame, Dict[str, Any]]:
+    """Downloads the aligned blocks around [start, end], so nearby days share one cache entry."""
+    if end < start:
+        return _fetch_historical(str(start), str(end), coords, columns)
+
+    first, last = _align_to_blocks(start, end)
+    frame = _fetch_historical(str(first), str(last), coords, columns)
+    return frame if isinstance(frame, dict) else _slice_days(frame, start, end)
+
+
+def _plan_store_fetches(
+        start: date,
+        end: date,
+        coords: List[float],
+        columns: List[str]
+) -> Optional[List[Tuple[date, date]]]:
+    """Decides which day ranges of `columns` must be downloaded to serve [start, end] via the store.
+
+    Outer edges of the ranges are widened to ARCHIVE_BLOCK boundaries, so
+    follow-up queries for nearby days find them already stored or cached.
+
+    Returns:
+        Optional[List[Tuple[date, date]]]: Ranges to download before assembling the
+            result from the store, or None if the request should bypass the store.
+    """
+    if end < start:
+        return None
+
+    covered = archive_store.coverage(coords, columns)
+    if covered is None:
+        return [_align_to_blocks(start, end)]
+
+    stored_start, stored_end = covered
+    max_gap = timedelta(days=config.ARCHIVE_STORE_MAX_GAP_DAYS)
+    if end < stored_start - max_gap or start > stored_end + max_gap:
+        # Far away from what is stored: extending the store would mean downloading the gap
+        return None
+
+    ranges = []
+    if start < stored_start:
+        ranges.append((_align_to_blocks(start, start)[0], stored_start - timedelta(days=1)))
+    if end > stored_end:
+        ranges.append((stored_end + timedelta(days=1), _align_to_blocks(end, end)[1]))
+    return ranges
+
+
+def _assemble_from_store(
+        start: date,
+        end: date,
+        coords: List[float],
+        fetched: List[pd.DataFrame],
+        columns: List[str]
+) -> pd.DataFrame:
+    """Persists the settled part of freshly downloaded frames and builds [start, end].
+
+    Settled days (older than ARCHIVE_SETTLED_LAG_DAYS) are written to the store;
+    newer days are served from the downloaded frames only, because the
+    reanalysis may still revise them.
+    """
+    settled_end = date.today() - timedelta(days=config.ARCHIVE_SETTLED_LAG_DAYS)
+
+    for frame in fetched:
+        archive_store.write(coords, frame[frame["date"].dt.date <= settled_end], columns)
+
+    parts = []
+    covered = archive_store.coverage(coords, columns)
+    if covered and start <= covered[1] and end >= covered[0]:
+        parts.append(archive_store.read(coords, max(start, covered[0]), min(end, covered[1]), columns))
+
+    for frame in fetched:
+        days = frame["date"].dt.date
+        outside_store = (days < covered[0]) | (days > covered[1]) if covered else True
+        parts.append(frame[(days >= start) & (days <= end) & outside_store])
+
+    parts = [part for part in parts if not part.empty]
+    if not parts:
+        return fetched[0].iloc[0:0] if fetched else pd.DataFrame()
+    return pd.concat(parts, ignore_index=True).sort_values("date", ignore_index=True)
+
+
+def _read_through_store(
+        start: date,
+        end: date,
+        coords: List[float],
+        columns: List[str]
+) -> Union[pd.DataFrame, Dict[str, Any]]:
+    """Serves an archive range from the local store, fetching only what it lacks."""
+    ranges = _plan_store_fetches(start, end, coords, columns)
+    if ranges is None:
+        return _fetch_historical_block(start, end, coords, columns)
+
+    fetched = [_fetch_historical(str(first), str(last), coords, columns) for first, last in ranges]
+    for frame in fetched:
+        if isinstance(frame, dict):
+            return frame
+
+    return _assemble_from_store(start, end, coords, fetched, columns)
 
 
 def get_historical_weather_data(
         start_date: str,
         end_date: str,
-        city_coords: List[float]
+        city_coords: List[float],
+        variables: Optional[Sequence[str]] = None,
+        use_store: bool = True
 ) -> Union[pd.DataFrame, Dict[str, Any]]:
     """Fetches historical daily weather data.
 
+    Reads from the local archive store first and only downloads missing days,
+    rounded out to ARCHIVE_BLOCK periods.
+
     Args:
         start_date: String YYYY-MM-DD.
         end_date: String YYYY-MM-DD.
         city_coords: [latitude, longitude].
+        variables: Subset of DAILY_VARIABLES to download (default: all).
+        use_store: Whether to read through the archive store. Bulk scans
+            downloading many chunks concurrently pass False: chunks landing in
+            completion order would leave the store holding one of them.
 
     Returns:
         Union[pd.DataFrame, Dict[str, Any]]: DataFrame with weather data or Dict with error info.
+
+    Raises:
+        ValueError: If a variable is unknown.
     """
-    params = {
-        "latitude": city_coords[0],
-        "longitude": city_coords[1],
-        "start_date": start_date,
-        "end_date": end_date,
-        "daily": config.DAILY_VARIABLES
-    }
+    columns = _select_columns(variables, config.DAILY_VARIABLES)
+    coords = canonical_coords(city_coords, config.OPEN_METEO_ARCHIVE_URL)
 
     try:
-        responses = openmeteo.weather_api(config.OPEN_METEO_ARCHIVE_URL, params=params)
-        response = responses[0]
+        start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    except ValueError as e:
+        return {"error": True, "reason": str(e)}
 
-        daily = response.Daily()
-        daily_data = {}
+    if not (config.ARCHIVE_STORE_ENABLED and use_store):
+        return _fetch_historical_block(start, end, coords, columns)
 
-        for i, var_name in enumerate(config.DAILY_VARIABLES):
-            daily_data[var_name] = daily.Variables(i).ValuesAsNumpy()
+    try:
+        return _read_through_store(start, end, coords, columns)
+    except OSError as e:
+        logger.warning(f"Archive store unavailable, fetching directly: {e}")
+        return _fetch_historical_block(start, end, coords, columns)
 
-        daily_data["date"] = pd.date_range(
-            start=pd.to_datetime(daily.Time(), unit="s", utc=True),
-            end=pd.to_datetime(daily.TimeEnd(), unit="s", utc=True),
-            freq=pd.Timedelta(seconds=daily.Interval()),
-            inclusive="left"
-        )
 
-        return pd.DataFrame(data=daily_data)
+def get_historical_weather_data_batch(
+        start_date: str,
+        end_date: str,
+        coords_list: Sequence[Sequence[float]]
+) -> Dict[Location, Union[pd.DataFrame, Dict[str, Any]]]:
+    """Fetches historical daily data for many locations in a few chunked requests.
 
-    except Exception as e:
-        return {"error": True, "reason": str(e)}
+    Locations whose settled range is already in the archive store, or whose
+    range is in the frame cache, are served locally; the rest share chunked
+    multi-location requests over ARCHIVE_BLOCK-aligned dates. Downloaded
+    frames are cached per location like single-city ones, and their settled
+    days are written back to the store.
+
+    Args:
+        start_date: String YYYY-MM-DD.
+        end_date: String YYYY-MM-DD.
+        coords_list: [latitude, longitude] pairs.
+
+    Returns:
+        Dict[Location, Union[pd.DataFrame, Dict[str, Any]]]:
+            Daily frame (or error dict) per input (lat, lon) tuple; every
+            location gets the error dict if a date is malformed.
+
+    Raises:
+        ValueError: If any coordinates are invalid.
+    """
+    url = config.OPEN_METEO_ARCHIVE_URL
+    groups = _unique_locations(coords_list, url)
+    frames: Dict[Location, Union[pd.DataFrame, Dict[str, Any]]] = {}
+    columns = config.DAILY_VARIABLES
+
+    try:
+        start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    except ValueError as e:
+        error = {"error": True, "reason": str(e)}
+        return {original: dict(error) for originals in groups.values() for original in originals}
+
+    first, last = _align_to_blocks(start, end) if start <= end else (start, end)
+    settled_end = date.today() - timedelta(days=config.ARCHIVE_SETTLED_LAG_DAYS)
+
+    def request(location: Location) -> Dict[str, Any]:
+        return {
+            "latitude": location[0],
+            "longitude": location[1],
+            "start_date": str(first),
+            "end_date": str(last),
+            "daily": columns
+        }
+
+    to_fetch: List[Location] = []
+    for location in groups:
+        covered = archive_store.coverage(location, columns) if config.ARCHIVE_STORE_ENABLED else None
+        if covered and covered[0] <= start and end <= covered[1]:
+            frames[location] = archive_store.read(location, start, end, columns)
+            continue
+        frame, _ = _from_cache(url, request(location), _decode_daily)
+        if frame is None:
+            to_fetch.append(location)
+        else:
+            frames[location] = _slice_days(frame, start, end)
+
+    for offset in range(0, len(to_fetch), config.BATCH_LOCATION_CHUNK_SIZE):
+        chunk = to_fetch[offset:offset + config.BATCH_LOCATION_CHUNK_SIZE]
+
+        try:
+            fetched = _download_batch(url, [request(location) for location in chunk], _decode_daily)
+        except Exception as e:
+            for location in chunk:
+                frames[location] = {"error": True, "reason": str(e)}
+            continue
+
+        for location, frame in zip(chunk, fetched):
+            frames[location] = _slice_days(frame, start, end)
+            if config.ARCHIVE_STORE_ENABLED and first <= settled_end:
+                archive_store.write(location, frame[frame["date"].dt.date <= settled_end], columns)
+
+    results: Dict[Location, Union[pd.DataFrame, Dict[str, Any]]] = {}
+    for location, originals in groups.items():
+        for original in originals:
+            frame = frames[location]
+            results[original] = frame.copy() if isinstance(frame, pd.DataFrame) else frame
+    return results
@@ -0,0 +1,41 @@
+import heapq
+import threading
+import time
+from typing import Dict, Hashable, List, Tuple
+
+
+class DemandTracker:
+    """Thread-safe request frequency per key, decayed exponentially over time.
+
+    Each request adds 1 to its key's score, and scores halve every
+    `half_life` seconds, so the hottest keys follow current traffic.
+    """
+
+    def __init__(self, half_life: float) -> None:
+        self.half_life = half_life
+        self._scores: Dict[Hashable, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def _decayed(self, score: float, updated: float, now: float) -> float:
+        return score * 0.5 ** ((now - updated) / self.half_life)
+
+    def record(self, key: Hashable) -> None:
+        now = time.monotonic()
+        with self._lock:
+            score, updated = self._scores.get(key, (0.0, now))
+            self._scores[key] = (self._decayed(score, updated, now) + 1.0, now)
+
+    def hottest(self, k: int, min_score: float = 0.0) -> List[Tuple[Hashable, float]]:
+        """Returns up to `k` (key, score) pairs with the highest current scores.
+
+        Keys whose score has decayed below `min_score` are dropped.
+        """
+        now = time.monotonic()
+        with self._lock:
+            current = {key: self._decayed(score, updated, now) for key, (score, updated) in self._scores.items()}
+            for key, score in current.items():
+                if score < min_score:
+                    del self._scores[key]
+
+        ranked = ((key, score) for key, score in current.items() if score >= min_score)
+        return heapq.nlargest(k, ranked, key=lambda item: item[1])
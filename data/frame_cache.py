@@ -0,0 +1,161 @@
+import threading
+import time
+import pandas as pd
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Entry:
+    def __init__(self, frame: pd.DataFrame, expires_at: float, nbytes: int) -> None:
+        self.frame = frame
+        self.expires_at = expires_at
+        self.nbytes = nbytes
+
+
+class FrameCache:
+    """Thread-safe, memory-bounded LRU of decoded DataFrames with per-entry TTLs.
+
+    Stored frames are never handed out directly; lookups return a copy, so
+    callers are free to mutate what they receive. Expired entries are kept
+    for `stale_retention` seconds so they can still be served stale.
+    `on_remove(key)` is called, under the cache lock, whenever an entry is
+    evicted, dropped after expiry or cleared (not when it is replaced).
+    """
+
+    def __init__(
+            self,
+            max_bytes: int,
+            stale_retention: float = 0.0,
+            on_remove: Optional[Callable[[Hashable], None]] = None
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.stale_retention = stale_retention
+        self.on_remove = on_remove
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes_held = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[pd.DataFrame]:
+        """Returns a copy of the cached frame, or None if missing or expired."""
+        return self.lookup(key)[0]
+
+    def lookup(self, key: Hashable, max_stale: float = 0.0) -> Tuple[Optional[pd.DataFrame], bool]:
+        """Looks a frame up, accepting entries expired for at most `max_stale` seconds.
+
+        Returns:
+            Tuple[Optional[pd.DataFrame], bool]: (copy of the frame or None, whether it is stale).
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now > entry.expires_at + self.stale_retention:
+                self._remove(key)
+                entry = None
+
+            if entry is None or now > entry.expires_at + max_stale:
+                self.misses += 1
+                return None, False
+
+            self._entries.move_to_end(key)
+            stale = now > entry.expires_at
+            if stale:
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+            frame = entry.frame
+
+        return frame.copy(), stale
+
+    def peek(self, key: Hashable) -> Tuple[Optional[pd.DataFrame], float]:
+        """Returns the stored (not copied) fresh frame and its seconds to expiry, without counting a lookup.
+
+        Returns (None, 0.0) for missing or expired entries. Callers must not mutate the frame.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            remaining = entry.expires_at - time.monotonic() if entry is not None else 0.0
+            if remaining <= 0:
+                return None, 0.0
+            return entry.frame, remaining
+
+    def expires_in(self, key: Hashable) -> Optional[float]:
+        """Seconds until the entry expires (negative once stale), or None if absent."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else entry.expires_at - time.monotonic()
+
+    def put(self, key: Hashable, frame: pd.DataFrame, ttl: float) -> None:
+        """Caches `frame` for `ttl` seconds (negative: no expiry), evicting LRU entries."""
+        with self._lock:
+            self._store(key, frame, ttl)
+
+    def merge(
+            self,
+            key: Hashable,
+            frame: pd.DataFrame,
+            ttl: float,
+            combine: Callable[[Optional[pd.DataFrame], float, pd.DataFrame, float], Tuple[pd.DataFrame, float]]
+    ) -> pd.DataFrame:
+        """Atomically combines `frame` with the fresh entry under `key` and caches the result.
+
+        `combine(existing, remaining, frame, ttl)` runs under the cache lock and
+        returns the (frame, ttl) to store; `existing` is None for a missing or
+        expired entry and must not be mutated.
+
+        Returns:
+            pd.DataFrame: The frame that was stored.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            remaining = entry.expires_at - time.monotonic() if entry is not None else 0.0
+            existing = entry.frame if remaining > 0 else None
+            frame, ttl = combine(existing, remaining, frame, ttl)
+            self._store(key, frame, ttl)
+        return frame
+
+    def _store(self, key: Hashable, frame: pd.DataFrame, ttl: float) -> None:
+        """Stores an entry, evicting LRU entries; the caller holds the lock."""
+        nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+        if ttl == 0 or nbytes > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key, notify=False)
+        expires_at = time.monotonic() + ttl if ttl > 0 else float("inf")
+        self._entries[key] = _Entry(frame, expires_at, nbytes)
+        self.bytes_held += nbytes
+
+        while self.bytes_held > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: Hashable, notify: bool = True) -> None:
+        entry = self._entries.pop(key)
+        self.bytes_held -= entry.nbytes
+        if notify and self.on_remove is not None:
+            self.on_remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit ratio, memory held and entry counts."""
+        with self._lock:
+            served = self.hits + self.stale_hits
+            lookups = served + self.misses
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_ratio": round(served / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes_held": self.bytes_held,
+                "evictions": self.evictions
+            }
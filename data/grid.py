@@ -0,0 +1,45 @@
+from typing import Dict, Iterable, List, Sequence, Tuple
+from settings import config
+
+
+def grid_resolution(url: str) -> float:
+    """Returns the model grid spacing (degrees) used for an endpoint, 0 if unknown."""
+    return config.GRID_RESOLUTION_DEG.get(url, 0.0)
+
+
+def grid_cell(city_coords: Sequence[float], url: str) -> Tuple[int, int]:
+    """Index of the model grid node nearest to the coordinates."""
+    resolution = grid_resolution(url)
+    if not resolution:
+        return round(city_coords[0] * 10000), round(city_coords[1] * 10000)
+    return round(city_coords[0] / resolution), round(city_coords[1] / resolution)
+
+
+def canonical_coords(city_coords: Sequence[float], url: str) -> List[float]:
+    """Snaps coordinates to the model grid node the endpoint would answer from.
+
+    Returns the coordinates unchanged when snapping is disabled or the
+    endpoint's grid is unknown.
+    """
+    resolution = grid_resolution(url)
+    if not config.GRID_SNAPPING_ENABLED or not resolution:
+        return [city_coords[0], city_coords[1]]
+
+    row, col = grid_cell(city_coords, url)
+    return [round(row * resolution, 4), round(col * resolution, 4)]
+
+
+def dedup_ratio(points: Iterable[Sequence[float]], url: str) -> Tuple[int, int, float]:
+    """Measures how many distinct grid cells a set of locations falls into.
+
+    Returns:
+        Tuple[int, int, float]: (locations, distinct cells, locations per cell).
+    """
+    cells: Dict[Tuple[int, int], int] = {}
+    total = 0
+    for point in points:
+        total += 1
+        key = grid_cell(point, url)
+        cells[key] = cells.get(key, 0) + 1
+
+    return total, len(cells), (total / len(cells) if cells else 0.0)
@@ -0,0 +1,50 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """Thread-safe token bucket limiting how often upstream calls may start.
+
+    Up to `burst` calls may start at once; after that, calls are spaced at
+    `rate` per second.
+    """
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive.")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        """Takes a token if one is available, without waiting."""
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def acquire(self) -> float:
+        """Blocks until a call may start.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        with self._lock:
+            self._refill()
+
+            # Reserve the token now; callers queue up behind each other
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait:
+            time.sleep(wait)
+        return wait
@@ -0,0 +1,110 @@
+import asyncio
+import threading
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+def request_key(url: str, params: Dict[str, Any]) -> Tuple:
+    """Canonical, hashable identity of an API request."""
+    items = []
+    for key, value in sorted(params.items()):
+        items.append((key, tuple(value) if isinstance(value, (list, tuple)) else value))
+    return url, tuple(items)
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution.
+
+    The first caller (the leader) runs the function; callers arriving while it
+    is in flight wait and receive the same result or exception.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.stats: Counter = Counter()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Runs `fn` once per in-flight key.
+
+        Returns:
+            Tuple[Any, bool]: (result, shared) where `shared` is True whenever the
+                result object was handed to more than one caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.stats["coalesced"] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.stats["executed"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, call.waiters > 0
+
+
+class _AsyncCall:
+    def __init__(self, task: asyncio.Future) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class AsyncSingleFlight:
+    """Event-loop counterpart of SingleFlight for coroutine functions.
+
+    The leader's call runs as its own task, so cancelling any caller (the
+    leader included) only stops that caller from waiting; the others still
+    receive the result.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, _AsyncCall] = {}
+        self.stats: Counter = Counter()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Awaits `fn` once per in-flight key; see SingleFlight.do."""
+        call = self._calls.get(key)
+        if call is not None:
+            call.waiters += 1
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(call.task), True
+
+        self.stats["executed"] += 1
+        call = self._calls[key] = _AsyncCall(asyncio.ensure_future(fn()))
+        call.task.add_done_callback(lambda task: self._finish(key, call))
+
+        result = await asyncio.shield(call.task)
+        return result, call.waiters > 0
+
+    def _finish(self, key: Hashable, call: _AsyncCall) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.task.cancelled():
+            # Mark retrieved so an exception nobody waited for is not logged as unhandled
+            call.task.exception()
@@ -1,6 +1,7 @@
 import logging
 import gradio as gr
 from core.assistant import WeatherAssistant
+from services.refresh_scheduler import RefreshAheadScheduler
 from settings import config
 
 logger = logging.getLogger("NeuroWeather")
@@ -38,5 +39,13 @@ def run_web_ui(app: WeatherAssistant) -> None:
         submit_btn.click(fn=interact, inputs=input_box, outputs=output_box)
         input_box.submit(fn=interact, inputs=input_box, outputs=output_box)
 
+    scheduler = RefreshAheadScheduler() if config.REFRESH_AHEAD_ENABLED else None
+    if scheduler:
+        scheduler.start()
+
     print(f"Launching Web UI: {config.UI_TITLE}")
-    demo.launch(inbrowser=True)
+    try:
+        demo.launch(inbrowser=True)
+    finally:
+        if scheduler:
+            scheduler.stop()
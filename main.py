@@ -1,9 +1,14 @@
 import sys
 import logging
 import argparse
+from typing import List, Tuple
 from core.assistant import WeatherAssistant
 from interfaces.cli import run_cli
 from interfaces.web import run_web_ui
+from services.cache_warmer import CacheWarmer
+from services.location_tool import LocationFinder
+from services.usage_log import top_cities
+from settings import config
 
 
 def setup_logging() -> None:
@@ -20,19 +25,63 @@ def parse_arguments() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="NeuroWeather AI System")
     parser.add_argument(
         "--mode",
-        choices=["cli", "web"],
+        choices=["cli", "web", "warm"],
         default="cli",
-        help="Interface mode: 'cli' for terminal, 'web' for browser UI."
+        help="Interface mode: 'cli' for terminal, 'web' for browser UI, 'warm' to prefetch caches and exit."
+    )
+    parser.add_argument(
+        "--cities",
+        nargs="+",
+        metavar="CITY",
+        help="Warm mode: cities to prefetch (default: the most requested cities in the usage log)."
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=config.WARMUP_TOP_N,
+        help="Warm mode: number of cities taken from the usage log."
     )
     return parser.parse_args()
 
 
+def run_warmup(args: argparse.Namespace) -> None:
+    """Prefetches forecasts and archive windows, then logs a summary."""
+    logger = logging.getLogger(__name__)
+
+    cities: List[Tuple[str, List[float]]] = []
+    if args.cities:
+        finder = LocationFinder()
+        for query in args.cities:
+            name, coords = finder.find_coordinates(query)
+            if name and coords:
+                cities.append((name, coords))
+            else:
+                logger.warning(f"City '{query}' not found, skipping.")
+    else:
+        cities = top_cities(args.top)
+
+    if not cities:
+        logger.error("No cities to warm up. Pass --cities or collect a usage log first.")
+        sys.exit(1)
+
+    logger.info(f"Warming caches for {len(cities)} cities...")
+    summary = CacheWarmer().warm(cities)
+    logger.info(
+        f"Warm-up finished: {summary['jobs'] - summary['failed']}/{summary['jobs']} jobs ok, "
+        f"{summary['requests']} upstream requests, {summary['bytes'] / 1024:.1f} KiB in {summary['seconds']} s."
+    )
+
+
 def main() -> None:
     # 1. Setup Environment
     setup_logging()
     args = parse_arguments()
     logger = logging.getLogger(__name__)
 
+    if args.mode == "warm":
+        run_warmup(args)
+        return
+
     # 2. Initialize Core Logic (Dependency Injection)
     try:
         app = WeatherAssistant()
@@ -0,0 +1,92 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+import numpy as np
+import pandas as pd
+from data.data_getter import get_daily_forecast, get_historical_weather_data, get_download_stats, set_upstream_limiter
+from data.rate_limit import RateLimiter
+from services.weather_service import WeatherService
+from settings import config
+
+logger = logging.getLogger("NeuroWeather")
+
+
+class CacheWarmer:
+    """Prefetches forecasts and recent archive windows for a list of cities.
+
+    Requests go through `data_getter`, so they populate the same HTTP cache,
+    frame cache and archive store that user queries read from. Climate
+    normals are built too, since reports never build them synchronously.
+    The rate limit applies to every upstream call made while warming, so a
+    climatology job downloading decades of archive chunks is throttled too.
+    """
+
+    def __init__(
+            self,
+            workers: int = config.WARMUP_WORKERS,
+            rate_per_second: float = config.WARMUP_RATE_PER_SECOND
+    ) -> None:
+        self.workers = workers
+        self.limiter = RateLimiter(rate_per_second, burst=workers)
+
+    @staticmethod
+    def _jobs(city: str, coords: List[float]) -> List[Tuple[str, Callable[[], Any]]]:
+        """The same requests WeatherService issues for a city."""
+        today = date.today()
+        archive_start = str(today - timedelta(days=config.WARMUP_ARCHIVE_DAYS))
+        horizon_end = str(today + timedelta(days=config.FORECAST_HORIZON_DAYS - 1))
+        jobs = [
+            # Single-day report queries are cut out of the full-horizon window
+            (f"{city}: forecast", lambda: get_daily_forecast(coords, str(today), horizon_end)),
+            (f"{city}: archive", lambda: get_historical_weather_data(archive_start, str(today), coords))
+        ]
+        if config.CLIMATOLOGY_ENABLED:
+            # Reports only compare with normals that already exist
+            jobs.append((f"{city}: climatology", lambda: WeatherService.climatology.stats(coords)))
+        return jobs
+
+    @staticmethod
+    def _run_job(job: Callable[[], Any]) -> bool:
+        result = job()
+        return isinstance(result, (pd.DataFrame, np.ndarray)) and result.size > 0
+
+    def warm(self, cities: List[Tuple[str, List[float]]]) -> Dict[str, Any]:
+        """Warms the caches for `cities`, logging progress as jobs complete.
+
+        Args:
+            cities: (name, [lat, lon]) pairs.
+
+        Returns:
+            Dict[str, Any]: Summary with job counts, seconds and bytes downloaded.
+        """
+        jobs = [job for city, coords in cities for job in self._jobs(city, coords)]
+        downloads_before = get_download_stats()
+        started = time.perf_counter()
+        failed = 0
+
+        previous_limiter = set_upstream_limiter(self.limiter)
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="warmup") as pool:
+                futures = {pool.submit(self._run_job, fn): label for label, fn in jobs}
+                for done, future in enumerate(as_completed(futures), start=1):
+                    try:
+                        ok = future.result()
+                    except Exception as e:
+                        logger.debug(f"Warm-up job failed: {e}")
+                        ok = False
+                    failed += not ok
+                    logger.info(f"[{done}/{len(jobs)}] {futures[future]} {'ok' if ok else 'FAILED'}")
+        finally:
+            set_upstream_limiter(previous_limiter)
+
+        downloads_after = get_download_stats()
+        return {
+            "cities": len(cities),
+            "jobs": len(jobs),
+            "failed": failed,
+            "seconds": round(time.perf_counter() - started, 2),
+            "requests": downloads_after["requests"] - downloads_before["requests"],
+            "bytes": downloads_after["bytes"] - downloads_before["bytes"]
+        }
@@ -0,0 +1,227 @@
+import logging
+import mmap
+import os
+import struct
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from services.city_index import FoldedNameTable, TrigramIndex
+from services.geo_index import GeoGrid
+from settings import config
+
+logger = logging.getLogger("NeuroWeather")
+
+# File layout (little-endian):
+#   header     MAGIC, section count: uint32, reserved: uint32
+#   directory  per section: name (24 bytes, NUL padded), dtype (4 bytes), offset: uint64, count: uint64
+#   sections   raw arrays, each starting on an 8-byte boundary
+# Sections: "names.offsets", "names.blob", "lat", "lon", plus the prebuilt lookup
+# indexes under the "trigram.", "folded." and "geo." prefixes.
+MAGIC = b"NWCITY02"
+_HEADER = struct.Struct("<8sII")
+_SECTION = struct.Struct("<24s4sQQ")
+_ALIGN = 8
+_COORD_DECIMALS = 5  # float32 keeps ~7 significant digits; drop the noise
+
+
+def _index_sections(names: List[str], points: List[List[float]]) -> Dict[str, np.ndarray]:
+    """Builds the lookup indexes LocationFinder would otherwise build on first use."""
+    sections = {}
+    for prefix, index in (
+            ("trigram", TrigramIndex(names)),
+            ("folded", FoldedNameTable(names)),
+            ("geo", GeoGrid(points, config.GEO_GRID_CELL_DEG))
+    ):
+        sections.update({f"{prefix}.{name}": array for name, array in index.to_arrays().items()})
+    return sections
+
+
+def write_city_database(path: str, entries: Iterable[Tuple[str, Sequence[float]]]) -> int:
+    """Compiles (name, [lat, lon]) entries, with their prebuilt lookup indexes, into the binary format.
+
+    Args:
+        path: Output file path.
+        entries: City names with coordinates, in lookup priority order.
+
+    Returns:
+        int: Number of cities written.
+    """
+    names: List[str] = []
+    lats: List[float] = []
+    lons: List[float] = []
+
+    for name, coords in entries:
+        names.append(name)
+        lats.append(coords[0])
+        lons.append(coords[1])
+
+    encoded = [name.encode("utf-8") for name in names]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u4")
+    offsets[1:] = np.cumsum([len(raw) for raw in encoded])
+
+    lat = np.asarray(lats, dtype="<f4")
+    lon = np.asarray(lons, dtype="<f4")
+    # Indexes see the same rounded coordinates the database serves
+    points = np.column_stack((lat, lon)).astype(np.float64).round(_COORD_DECIMALS).tolist()
+
+    sections = {
+        "names.offsets": offsets,
+        "names.blob": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "lat": lat,
+        "lon": lon,
+        **_index_sections(names, points)
+    }
+
+    directory = []
+    pos = _HEADER.size + _SECTION.size * len(sections)
+    for name, array in sections.items():
+        pos += -pos % _ALIGN
+        array = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder("<"))
+        directory.append((name, array, pos))
+        pos += array.nbytes
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as fh:
+        fh.write(_HEADER.pack(MAGIC, len(sections), 0))
+        for name, array, offset in directory:
+            fh.write(_SECTION.pack(name.encode("ascii"), array.dtype.str.encode("ascii"), offset, array.size))
+        for _, array, offset in directory:
+            fh.write(b"\0" * (offset - fh.tell()))
+            fh.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+    return len(names)
+
+
+class _NameView(Sequence[str]):
+    """Names of a CityDatabase, decoded one at a time on access."""
+
+    def __init__(self, database: "CityDatabase") -> None:
+        self._database = database
+
+    def __len__(self) -> int:
+        return len(self._database)
+
+    def __getitem__(self, idx: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(idx, slice):
+            return [self._database.name(i) for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        return self._database.name(idx)
+
+
+class DictCitySource:
+    """City source backed by an in-memory {name: [lat, lon]} dictionary."""
+
+    def __init__(self, cities: Dict[str, List[float]]) -> None:
+        self._cities = cities
+        self._names = list(cities.keys())
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def names(self) -> List[str]:
+        return self._names
+
+    def coordinates(self, idx: int) -> List[float]:
+        return self._cities[self._names[idx]]
+
+    def points(self) -> List[List[float]]:
+        return [self._cities[name] for name in self._names]
+
+    def sections(self, prefix: str) -> Optional[Dict[str, np.ndarray]]:
+        # Indexes of a plain dictionary are always built in memory
+        return None
+
+
+class CityDatabase:
+    """Read-only, memory-mapped view of a compiled city database.
+
+    Nothing is read until the first access. Names and coordinates are then
+    decoded on demand straight from the mapped file, and the prebuilt lookup
+    indexes are used in place, so neither startup nor the first query scales
+    with the number of cities.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._map: Optional[mmap.mmap] = None
+        self._sections: Dict[str, np.ndarray] = {}
+
+    def _open(self) -> None:
+        with open(self.path, "rb") as fh:
+            # mmap cannot map an empty file
+            if os.fstat(fh.fileno()).st_size < _HEADER.size:
+                raise ValueError(f"{self.path} is not a NeuroWeather city database (file too short).")
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count, _ = _HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC:
+            mapped.close()
+            raise ValueError(f"{self.path} is not a NeuroWeather city database; rebuild it with tools/build_city_db.py.")
+
+        for pos in range(_HEADER.size, _HEADER.size + count * _SECTION.size, _SECTION.size):
+            name, dtype, offset, size = _SECTION.unpack_from(mapped, pos)
+            dtype = dtype.rstrip(b"\0").decode("ascii")
+            self._sections[name.rstrip(b"\0").decode("ascii")] = np.frombuffer(
+                mapped, dtype=dtype, count=size, offset=offset
+            )
+        self._map = mapped
+
+        logger.debug(f"Mapped city database {self.path}: {len(self)} cities, {len(self._sections)} sections.")
+
+    def _ensure_open(self) -> None:
+        if self._map is None:
+            self._open()
+
+    def __len__(self) -> int:
+        self._ensure_open()
+        return len(self._sections["lat"])
+
+    def name(self, idx: int) -> str:
+        self._ensure_open()
+        offsets = self._sections["names.offsets"]
+        return self._sections["names.blob"][int(offsets[idx]):int(offsets[idx + 1])].tobytes().decode("utf-8")
+
+    def names(self) -> Sequence[str]:
+        return _NameView(self)
+
+    def coordinates(self, idx: int) -> List[float]:
+        self._ensure_open()
+        lat, lon = self._sections["lat"], self._sections["lon"]
+        return [round(float(lat[idx]), _COORD_DECIMALS), round(float(lon[idx]), _COORD_DECIMALS)]
+
+    def points(self) -> List[List[float]]:
+        self._ensure_open()
+        lat, lon = self._sections["lat"], self._sections["lon"]
+        return np.column_stack((lat, lon)).astype(np.float64).round(_COORD_DECIMALS).tolist()
+
+    def sections(self, prefix: str) -> Optional[Dict[str, np.ndarray]]:
+        """Returns the mapped arrays of one prebuilt index ("trigram", "folded" or "geo"), or None."""
+        self._ensure_open()
+        arrays = {
+            name[len(prefix) + 1:]: array for name, array in self._sections.items() if name.startswith(f"{prefix}.")
+        }
+        return arrays or None
+
+
+CitySource = Union[DictCitySource, CityDatabase]
+
+
+def load_city_source(path: Optional[str] = None) -> CitySource:
+    """Picks the city source: the compiled database if present, else the bundled dict.
+
+    Args:
+        path: Compiled database path. Defaults to config.CITY_DB_PATH.
+
+    Returns:
+        CitySource: Lazily loaded city source.
+    """
+    path = path or config.CITY_DB_PATH
+    if path and os.path.exists(path):
+        return CityDatabase(path)
+
+    # Imported here so the 2,300-line literal is only compiled when actually used
+    from settings.cities import CITY_COORDINATES
+    return DictCitySource(CITY_COORDINATES)
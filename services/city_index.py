@@ -0,0 +1,279 @@
+import re
+import unicodedata
+import numpy as np
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from rapidfuzz import fuzz as rf_fuzz
+from thefuzz import process, fuzz, utils
+
+# Letters that NFKD does not decompose into base letter + combining mark
+_EXTRA_FOLDS = str.maketrans({"ł": "l", "ø": "o", "đ": "d", "ß": "ss"})
+_QUALIFIER = re.compile(r"\([^)]*\)")
+_SEPARATORS = re.compile(r"[\W_]+")
+
+# Character-bag columns: folded ASCII letters, digits and space, then one bucket for every other character
+_BAG_COLUMNS = {ch: col for col, ch in enumerate(" 0123456789abcdefghijklmnopqrstuvwxyz")}
+_BAG_OTHER = len(_BAG_COLUMNS)
+_BAG_MAX = np.iinfo(np.uint8).max
+
+
+def fold_name(text: str) -> str:
+    """Normalizes a place name for exact matching.
+
+    Casefolds, strips diacritics ("Łódź" -> "lodz") and collapses punctuation
+    and whitespace into single spaces.
+    """
+    folded = unicodedata.normalize("NFKD", text.casefold()).translate(_EXTRA_FOLDS)
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return _SEPARATORS.sub(" ", folded).strip()
+
+
+@lru_cache(maxsize=None)
+def _bag_column(ch: str) -> int:
+    folded = ch if ch == " " else fold_name(ch)
+    return _BAG_COLUMNS.get(folded, _BAG_OTHER)
+
+
+def _bag(text: str) -> np.ndarray:
+    """Counts the characters of a processed string per bag column, saturating at 255."""
+    counts = np.zeros(_BAG_OTHER + 1, dtype=np.int32)
+    for ch, count in Counter(text).items():
+        counts[_bag_column(ch)] += count
+    return np.minimum(counts, _BAG_MAX).astype(np.uint8)
+
+
+def _trigrams(text: str) -> Set[str]:
+    """Splits an already processed string into padded character trigrams."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SortedStringTable:
+    """Strings sorted by their UTF-8 bytes, stored as an offsets array and one byte blob.
+
+    Lookups are binary searches over the blob, so a table memory-mapped from
+    the city database is searched without decoding its strings.
+    """
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray) -> None:
+        self.offsets = offsets
+        self.blob = blob
+
+    @classmethod
+    def build(cls, strings: Iterable[str]) -> "SortedStringTable":
+        """Builds a table from unique strings already sorted by their UTF-8 bytes."""
+        encoded = [text.encode("utf-8") for text in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(raw) for raw in encoded])
+        return cls(offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def _bytes(self, pos: int) -> bytes:
+        return self.blob[int(self.offsets[pos]):int(self.offsets[pos + 1])].tobytes()
+
+    def find(self, text: str) -> Optional[int]:
+        """Returns the position of `text`, or None if it is not in the table."""
+        key = text.encode("utf-8")
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._bytes(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(self) and self._bytes(lo) == key else None
+
+
+def _gram_codes(grams: Iterable[str]) -> np.ndarray:
+    """Packs trigrams into int64 codes (21 bits per code point) that sort like the strings."""
+    return np.array([(ord(g[0]) << 42) | (ord(g[1]) << 21) | ord(g[2]) for g in grams], dtype=np.int64)
+
+
+def _utf8_order(strings: Iterable[str]) -> List[str]:
+    return sorted(strings, key=lambda text: text.encode("utf-8"))
+
+
+class TrigramIndex:
+    """Inverted index of character trigrams used to pre-select fuzzy match candidates.
+
+    Postings are stored in CSR form (one id array sliced per trigram), so
+    the index converts to flat arrays for the compiled city database and
+    back without rebuilding.
+    """
+
+    def __init__(self, names: Sequence[str]) -> None:
+        postings: Dict[str, List[int]] = defaultdict(list)
+        gram_counts = np.zeros(len(names), dtype=np.int32)
+        processed = [utils.full_process(name) for name in names]
+
+        for idx, text in enumerate(processed):
+            grams = _trigrams(text)
+            gram_counts[idx] = len(grams)
+            for gram in grams:
+                postings[gram].append(idx)
+
+        grams = sorted(postings)
+        self.size = len(names)
+        self._gram_counts = gram_counts
+        self._gram_codes = _gram_codes(grams)
+        self._posting_offsets = np.zeros(len(grams) + 1, dtype=np.int64)
+        self._posting_offsets[1:] = np.cumsum([len(postings[gram]) for gram in grams])
+        self._posting_ids = np.fromiter(
+            (idx for gram in grams for idx in postings[gram]), dtype=np.int32, count=int(self._posting_offsets[-1])
+        )
+
+        # Character bags bound the longest common subsequence, and so fuzz.ratio, from above.
+        # Pooling characters into a fixed set of buckets keeps the bound valid, since
+        # min(a1 + a2, b1 + b2) >= min(a1, b1) + min(a2, b2), at one byte per bucket and name.
+        self._bags = np.zeros((len(names), _BAG_OTHER + 1), dtype=np.uint8)
+        for idx, text in enumerate(processed):
+            self._bags[idx] = _bag(text)
+        self._lengths = np.array([len(text) for text in processed], dtype=np.int32)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Flat arrays holding the whole index, for `from_arrays`."""
+        return {
+            "gram_codes": self._gram_codes,
+            "posting_offsets": self._posting_offsets, "posting_ids": self._posting_ids,
+            "gram_counts": self._gram_counts, "bags": self._bags.reshape(-1), "lengths": self._lengths
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "TrigramIndex":
+        """Wraps arrays from `to_arrays` (e.g. memory-mapped) without copying them."""
+        index = cls.__new__(cls)
+        index.size = len(arrays["lengths"])
+        index._gram_counts = arrays["gram_counts"]
+        index._gram_codes = arrays["gram_codes"]
+        index._posting_offsets = arrays["posting_offsets"]
+        index._posting_ids = arrays["posting_ids"]
+        index._bags = arrays["bags"].reshape(index.size, _BAG_OTHER + 1)
+        index._lengths = arrays["lengths"]
+        return index
+
+    def candidates(self, query: str, limit: int) -> List[int]:
+        """Returns ids of the names sharing the most trigrams with the query.
+
+        Args:
+            query: Raw query string.
+            limit: Maximum number of candidates to return.
+
+        Returns:
+            List[int]: Candidate ids in ascending order (empty if nothing overlaps).
+        """
+        query_grams = _trigrams(utils.full_process(query))
+        codes = _gram_codes(query_grams)
+        pos = np.minimum(np.searchsorted(self._gram_codes, codes), max(len(self._gram_codes) - 1, 0))
+        known = pos[self._gram_codes[pos] == codes] if len(self._gram_codes) else pos[:0]
+        hits = [self._posting_ids[self._posting_offsets[p]:self._posting_offsets[p + 1]] for p in known]
+        if not hits:
+            return []
+
+        shared = np.bincount(np.concatenate(hits), minlength=self.size)
+        ids = np.flatnonzero(shared)
+
+        if len(ids) > limit:
+            # Dice coefficient on trigram sets, so short names are not drowned out by long ones
+            dice = shared[ids] / (self._gram_counts[ids] + len(query_grams))
+            ids = np.sort(ids[np.argpartition(-dice, limit - 1)[:limit]])
+
+        return ids.tolist()
+
+    def reachable(self, query: str, score: float) -> np.ndarray:
+        """Returns ids of the names whose `fuzz.ratio` with the query could reach `score`.
+
+        fuzz.ratio is 200 * LCS / (len(a) + len(b)) on the processed strings,
+        and the LCS is at most the shorter length and at most the overlap of
+        the two (bucketed) character bags. Names outside the result provably
+        score lower.
+
+        Args:
+            query: Raw query string.
+            score: Unrounded ratio (0-100) a name has to be able to reach.
+
+        Returns:
+            np.ndarray: Ids in ascending order.
+        """
+        text = utils.full_process(query)
+        totals = np.maximum(self._lengths + len(text), 1)
+        threshold = score - 1e-6
+
+        # Cheap length bound first, then the character-bag bound on the survivors
+        ids = np.flatnonzero(200.0 * np.minimum(self._lengths, len(text)) / totals >= threshold)
+
+        query_bag = _bag(text)
+        if query_bag.max(initial=0) == _BAG_MAX:
+            # A saturated query count could understate the overlap
+            return ids
+        overlap = np.minimum(self._bags[ids], query_bag).sum(axis=1, dtype=np.int32)
+
+        return ids[200.0 * overlap / totals[ids] >= threshold]
+
+    def best_match(self, query: str, names: Sequence[str], limit: int) -> Optional[Tuple[str, int, int]]:
+        """Finds the same best `fuzz.ratio` match as a full `process.extractOne` scan of `names`.
+
+        The `limit` names sharing the most trigrams are scored first. Every
+        other name whose upper bound reaches that score is then scored too, so
+        a better (or equal, lower-id) name the prefilter missed still wins.
+
+        Args:
+            query: Raw query string.
+            names: The names the index was built from.
+            limit: Number of trigram candidates scored first.
+
+        Returns:
+            Optional[Tuple[str, int, int]]: (name, rounded score, id), or None if `names` is empty.
+        """
+        def extract(ids: Sequence[int]) -> Optional[Tuple[str, int, int]]:
+            return process.extractOne(query, {int(i): names[int(i)] for i in ids}, scorer=fuzz.ratio)
+
+        candidate_ids = self.candidates(query, limit)
+        best = extract(candidate_ids) if candidate_ids else None
+
+        best_score = rf_fuzz.ratio(utils.full_process(query), utils.full_process(best[0])) if best else 0.0
+        reachable = self.reachable(query, best_score)
+        if np.isin(reachable, candidate_ids).all():
+            return best
+        return extract(np.union1d(reachable, np.asarray(candidate_ids, dtype=reachable.dtype)))
+
+
+class FoldedNameTable:
+    """Exact lookup table keyed by diacritic-folded city names.
+
+    Every name is registered under its folded full form ("adamow siedleckie")
+    and under its folded base form without the "(siedleckie)"-style qualifier
+    ("adamow"). Base forms shared by several cities resolve to the first one listed.
+    """
+
+    def __init__(self, names: Sequence[str]) -> None:
+        keys: Dict[str, int] = {}
+
+        for idx, name in enumerate(names):
+            keys.setdefault(fold_name(name), idx)
+
+        for idx, name in enumerate(names):
+            keys.setdefault(fold_name(_QUALIFIER.sub(" ", name)), idx)
+
+        ordered = _utf8_order(keys)
+        self._keys = SortedStringTable.build(ordered)
+        self._ids = np.array([keys[key] for key in ordered], dtype=np.int32)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Flat arrays holding the whole table, for `from_arrays`."""
+        return {"key_offsets": self._keys.offsets, "key_blob": self._keys.blob, "ids": self._ids}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "FoldedNameTable":
+        """Wraps arrays from `to_arrays` (e.g. memory-mapped) without copying them."""
+        table = cls.__new__(cls)
+        table._keys = SortedStringTable(arrays["key_offsets"], arrays["key_blob"])
+        table._ids = arrays["ids"]
+        return table
+
+    def get(self, query: str) -> Optional[int]:
+        """Returns the id of the exactly matching name, or None."""
+        pos = self._keys.find(fold_name(query))
+        return None if pos is None else int(self._ids[pos])
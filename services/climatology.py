@@ -0,0 +1,224 @@
+import json
+import logging
+import os
+import threading
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Any, Dict, List, Optional, Set, Tuple
+from data.archive_store import ArchiveStore
+from data.grid import canonical_coords
+from services.record_index import iter_archive_chunks
+from settings import config
+
+logger = logging.getLogger("NeuroWeather")
+
+# Statistics per column and day of year, in this order along the last axis
+STATISTICS = ("mean", "p10", "p50", "p90")
+
+# Day-of-year offsets of a leap year, so Feb 29 gets its own slot
+_MONTH_OFFSETS = np.cumsum([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30])
+_DAYS_IN_YEAR = 366
+
+# p90 - p10 of a normal distribution, in standard deviations
+_P10_P90_SIGMAS = 2.5631
+
+
+def day_of_year(day: date) -> int:
+    """Zero-based day of year on a leap-year calendar (Mar 1 is always 60)."""
+    return int(_MONTH_OFFSETS[day.month - 1]) + day.day - 1
+
+
+def anomaly_label(value: float, normal: Dict[str, float]) -> str:
+    """Classifies a value against its day-of-year percentiles."""
+    if value > normal["p90"]:
+        return "unusually high"
+    if value < normal["p10"]:
+        return "unusually low"
+    return "typical"
+
+
+def anomaly_score(value: float, normal: Dict[str, float]) -> Optional[float]:
+    """Standard score of a value, estimated robustly from its day-of-year percentiles.
+
+    The median stands in for the mean and the 10-90 percentile spread for the
+    standard deviation. Returns None when the spread is zero (e.g. no rain on
+    any baseline day), where a score is meaningless.
+    """
+    spread = (normal["p90"] - normal["p10"]) / _P10_P90_SIGMAS
+    if spread <= 0:
+        return None
+    return (value - normal["p50"]) / spread
+
+
+class Climatology:
+    """Day-of-year climate normals per archive grid cell.
+
+    For every CLIMATOLOGY_VARIABLES column, the mean and 10th/50th/90th
+    percentiles of each calendar day are computed once over the baseline
+    period, pooling the days within CLIMATOLOGY_WINDOW_DAYS on either side.
+    The result is a small float32 array saved as one `.npz` per cell and
+    kept in memory, so a normal is a single array lookup. Building takes
+    decades of archive data, so lookups never build: a cell without normals
+    is queued for a background build (or prepared by the cache warm-up) and
+    compares as unavailable until it is done.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self._loaded: Dict[str, np.ndarray] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=config.CLIMATOLOGY_BUILD_WORKERS, thread_name_prefix="climatology")
+        self._building: Set[str] = set()
+
+    def _path(self, coords: List[float]) -> str:
+        return os.path.join(self.root, f"{ArchiveStore.location_key(coords)}.npz")
+
+    def _lock(self, coords: List[float]) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(ArchiveStore.location_key(coords), threading.Lock())
+
+    @staticmethod
+    def _signature() -> Dict[str, Any]:
+        return {
+            "columns": config.CLIMATOLOGY_VARIABLES,
+            "start": str(config.CLIMATOLOGY_START),
+            "end": str(config.CLIMATOLOGY_END),
+            "window": config.CLIMATOLOGY_WINDOW_DAYS
+        }
+
+    def _load(self, coords: List[float]) -> Optional[np.ndarray]:
+        try:
+            with np.load(self._path(coords)) as data:
+                if json.loads(str(data["meta"])) != self._signature():
+                    return None
+                return data["stats"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save(self, coords: List[float], stats: np.ndarray) -> None:
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            path = self._path(coords)
+            with open(f"{path}.tmp", "wb") as fh:
+                np.savez(fh, meta=np.array(json.dumps(self._signature())), stats=stats)
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            logger.warning(f"Climatology not saved: {e}")
+
+    @staticmethod
+    def _compute(df: pd.DataFrame) -> np.ndarray:
+        """Reduces daily baseline data to a (columns, 366, statistics) float32 array."""
+        days = df["date"].dt
+        doy = _MONTH_OFFSETS[days.month.to_numpy() - 1] + days.day.to_numpy() - 1
+        values = np.stack([
+            pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64)
+            for column in config.CLIMATOLOGY_VARIABLES
+        ], axis=1)
+
+        # Rows per day of year, so each window is a concatenation of 2w + 1 groups
+        order = np.argsort(doy, kind="stable")
+        bounds = np.searchsorted(doy[order], np.arange(_DAYS_IN_YEAR + 1))
+        groups = [values[order[bounds[d]:bounds[d + 1]]] for d in range(_DAYS_IN_YEAR)]
+
+        window = config.CLIMATOLOGY_WINDOW_DAYS
+        stats = np.full((values.shape[1], _DAYS_IN_YEAR, len(STATISTICS)), np.nan, dtype=np.float32)
+        for d in range(_DAYS_IN_YEAR):
+            pooled = np.concatenate([groups[(d + k) % _DAYS_IN_YEAR] for k in range(-window, window + 1)])
+            if len(pooled) == 0 or np.isnan(pooled).all():
+                continue
+            stats[:, d, 0] = np.nanmean(pooled, axis=0)
+            stats[:, d, 1:] = np.nanpercentile(pooled, [10, 50, 90], axis=0).T
+        return stats
+
+    def stats(self, city_coords: List[float]) -> np.ndarray:
+        """Returns the (columns, 366, statistics) normals of a location, building them if needed.
+
+        Raises:
+            RuntimeError: If the baseline could not be downloaded.
+        """
+        coords = canonical_coords(city_coords, config.OPEN_METEO_ARCHIVE_URL)
+        key = ArchiveStore.location_key(coords)
+
+        with self._lock(coords):
+            stats = self._loaded.get(key)
+            if stats is None:
+                stats = self._load(coords)
+            if stats is None:
+                logger.info(f"Building climatology for {coords}.")
+                frames = list(iter_archive_chunks(
+                    coords, config.CLIMATOLOGY_START, config.CLIMATOLOGY_END, config.CLIMATOLOGY_VARIABLES
+                ))
+                if not frames:
+                    raise RuntimeError("no baseline data")
+                stats = self._compute(pd.concat(frames, ignore_index=True))
+                self._save(coords, stats)
+            self._loaded[key] = stats
+
+        return stats
+
+    def available(self, city_coords: List[float]) -> Optional[np.ndarray]:
+        """Returns the normals of a location if already built, queuing a background build otherwise."""
+        coords = canonical_coords(city_coords, config.OPEN_METEO_ARCHIVE_URL)
+        key = ArchiveStore.location_key(coords)
+
+        stats = self._loaded.get(key)
+        if stats is None:
+            stats = self._load(coords)
+            if stats is not None:
+                self._loaded[key] = stats
+        if stats is None:
+            self._build_in_background(coords)
+        return stats
+
+    def _build_in_background(self, coords: List[float]) -> None:
+        key = ArchiveStore.location_key(coords)
+        with self._locks_guard:
+            if key in self._building:
+                return
+            self._building.add(key)
+
+        def build() -> None:
+            try:
+                self.stats(coords)
+            except Exception as e:
+                logger.warning(f"Climatology build failed for {coords}: {e}")
+            finally:
+                with self._locks_guard:
+                    self._building.discard(key)
+
+        self._pool.submit(build)
+
+    def normal(self, city_coords: List[float], column: str, day: date) -> Optional[Dict[str, float]]:
+        """Returns {mean, p10, p50, p90} of `column` for the calendar day of `day`, or None if unavailable."""
+        if column not in config.CLIMATOLOGY_VARIABLES:
+            return None
+        stats = self.available(city_coords)
+        if stats is None:
+            return None
+        row = stats[config.CLIMATOLOGY_VARIABLES.index(column), day_of_year(day)]
+        if np.isnan(row).any():
+            return None
+        return dict(zip(STATISTICS, (float(value) for value in row)))
+
+    def anomalies(
+            self,
+            city_coords: List[float],
+            day: date,
+            values: Dict[str, float]
+    ) -> List[Tuple[str, float, Dict[str, float]]]:
+        """Pairs every known, non-missing value with its normal; empty until the normals are built.
+
+        Returns:
+            List[Tuple[str, float, Dict[str, float]]]: (column, value, normal) per comparable column.
+        """
+        results = []
+        for column, value in values.items():
+            if pd.isna(value):
+                continue
+            normal = self.normal(city_coords, column, day)
+            if normal is not None:
+                results.append((column, float(value), normal))
+        return results
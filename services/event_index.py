@@ -0,0 +1,232 @@
+import json
+import logging
+import os
+import threading
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from data.archive_store import ArchiveStore
+from data.grid import canonical_coords
+from services.record_index import iter_archive_chunks
+from services.rules import RuleSet
+from settings import config
+
+logger = logging.getLogger("NeuroWeather")
+
+
+class _Occurrences:
+    """Sorted day ordinals of one event's matches, with the measured values."""
+
+    def __init__(self, days: np.ndarray, values: np.ndarray) -> None:
+        self.days = days
+        self.values = values
+
+    @classmethod
+    def empty(cls) -> "_Occurrences":
+        return cls(np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32))
+
+    def extend(self, other: "_Occurrences") -> "_Occurrences":
+        return _Occurrences(np.concatenate([self.days, other.days]), np.concatenate([self.values, other.values]))
+
+
+class EventIndex:
+    """Per archive grid cell, the sorted dates on which every SEARCH_CONFIG event occurred.
+
+    Each cell's index is built lazily backwards from the settled days, in
+    chunks of HISTORY_SEARCH_CHUNK_YEARS that double at every step, and
+    saved as one `.npz` per cell with the first day it covers. A
+    last-occurrence query stops at the first chunk with a match; a count
+    extends the index only back to the period it asks about; neither goes
+    past HISTORY_SEARCH_MAX_YEARS. Settled days are appended as they
+    arrive; recent days the reanalysis may still revise are matched at
+    query time from the short-lived caches and never persisted. All events
+    are matched together by the compiled RuleSet, so every chunk is a
+    single pass over the data.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self.rules = RuleSet(config.SEARCH_CONFIG)
+        self._loaded: Dict[str, Tuple[Dict[str, Any], Dict[str, _Occurrences]]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _path(self, coords: List[float]) -> str:
+        return os.path.join(self.root, f"{ArchiveStore.location_key(coords)}.npz")
+
+    def _lock(self, coords: List[float]) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(ArchiveStore.location_key(coords), threading.Lock())
+
+    @staticmethod
+    def _signature() -> str:
+        return json.dumps(config.SEARCH_CONFIG, sort_keys=True)
+
+    def _load(self, coords: List[float]) -> Optional[Tuple[Dict[str, Any], Dict[str, _Occurrences]]]:
+        loaded = self._loaded.get(ArchiveStore.location_key(coords))
+        if loaded is None:
+            try:
+                with np.load(self._path(coords)) as data:
+                    meta = json.loads(str(data["meta"]))
+                    events = {
+                        name: _Occurrences(data[f"{name}.days"], data[f"{name}.values"]) for name in meta["events"]
+                    }
+            except (OSError, ValueError, KeyError):
+                return None
+            loaded = self._loaded[ArchiveStore.location_key(coords)] = meta, events
+
+        # Changed event definitions invalidate the index
+        return loaded if loaded[0].get("signature") == self._signature() else None
+
+    def _save(self, coords: List[float], meta: Dict[str, Any], events: Dict[str, _Occurrences]) -> None:
+        self._loaded[ArchiveStore.location_key(coords)] = meta, events
+        arrays = {"meta": np.array(json.dumps(meta))}
+        for name, occurrences in events.items():
+            arrays[f"{name}.days"] = occurrences.days
+            arrays[f"{name}.values"] = occurrences.values
+
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            path = self._path(coords)
+            with open(f"{path}.tmp", "wb") as fh:
+                np.savez(fh, **arrays)
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            logger.warning(f"Event index not saved: {e}")
+
+    def _scan(self, coords: List[float], start: date, end: date) -> Dict[str, _Occurrences]:
+        """Matches every event over [start, end] in one rule pass over the downloaded days.
+
+        Days before `start` are downloaded too when consecutive-day rules need
+        them. A spell is recorded under its first day, with that day's value,
+        once it has reached its length within [start, end].
+
+        Raises:
+            RuntimeError: If a chunk could not be downloaded.
+        """
+        lookback_start = start - timedelta(days=self.rules.lookback_days)
+        frames = list(iter_archive_chunks(coords, lookback_start, end, self.rules.columns))
+        if not frames:
+            return {name: _Occurrences.empty() for name in config.SEARCH_CONFIG}
+
+        # Chunks arrive in completion order
+        df = pd.concat(frames, ignore_index=True).sort_values("date", ignore_index=True)
+        days = np.array([day.toordinal() for day in df["date"].dt.date], dtype=np.int32)
+        in_range = days >= start.toordinal()
+
+        matches = {}
+        for name, mask in self.rules.evaluate(df).items():
+            rows = np.flatnonzero(mask & in_range) - (self.rules.min_days[name] - 1)
+            values = pd.to_numeric(df[self.rules.value_columns[name]], errors='coerce').to_numpy(dtype=np.float32)
+            matches[name] = _Occurrences(days[rows], values[rows])
+        return matches
+
+    def _updated(self, coords: List[float], settled_end: date) -> Tuple[Dict[str, Any], Dict[str, _Occurrences]]:
+        """Loads the cell's index, appending the days settled since it was saved; the caller holds the lock.
+
+        A new index covers nothing yet: its first day is the day after `settled_end`.
+
+        Raises:
+            RuntimeError: If the archive could not be downloaded.
+        """
+        loaded = self._load(coords)
+        if loaded is None:
+            meta = {"signature": self._signature(), "start": str(settled_end + timedelta(days=1)),
+                    "through": str(settled_end), "events": list(config.SEARCH_CONFIG)}
+            return meta, {name: _Occurrences.empty() for name in config.SEARCH_CONFIG}
+
+        meta, events = loaded
+        through = date.fromisoformat(meta["through"])
+        if through < settled_end:
+            logger.info(f"Updating event index for {coords} ({through + timedelta(days=1)} to {settled_end}).")
+            scanned = self._scan(coords, through + timedelta(days=1), settled_end)
+            events = {name: events[name].extend(scanned[name]) for name in events}
+            meta = {**meta, "through": str(settled_end)}
+            self._save(coords, meta, events)
+        return meta, events
+
+    def _extended_back(
+            self,
+            coords: List[float],
+            meta: Dict[str, Any],
+            events: Dict[str, _Occurrences],
+            back_to: date,
+            until_match: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, _Occurrences]]:
+        """Scans chunks before the first covered day until `back_to`, or until `until_match` has occurred.
+
+        Each chunk is saved as soon as it is scanned. Runs of consecutive days
+        crossing a chunk boundary are exact: a day's match only depends on the
+        days before it, which every scan downloads. The caller holds the lock.
+
+        Raises:
+            RuntimeError: If the archive could not be downloaded.
+        """
+        start = date.fromisoformat(meta["start"])
+        years = config.HISTORY_SEARCH_CHUNK_YEARS
+        while start > back_to and (until_match is None or len(events[until_match].days) == 0):
+            chunk_end = start - timedelta(days=1)
+            chunk_start = max(date(chunk_end.year - years + 1, 1, 1), back_to)
+            logger.info(f"Extending event index for {coords} back to {chunk_start}.")
+            scanned = self._scan(coords, chunk_start, chunk_end)
+            events = {name: scanned[name].extend(events[name]) for name in events}
+            meta = {**meta, "start": str(chunk_start)}
+            self._save(coords, meta, events)
+            start = chunk_start
+            years *= 2
+        return meta, events
+
+    @staticmethod
+    def _horizon(today: date) -> date:
+        """First day an index may reach back to."""
+        return max(today - timedelta(days=365 * config.HISTORY_SEARCH_MAX_YEARS), config.ARCHIVE_START_DATE)
+
+    def last_occurrence(self, city_coords: List[float], event_type: str) -> Tuple[Optional[Tuple[date, float]], date]:
+        """Returns ((day, measured value) of the latest match or None, first day covered).
+
+        Raises:
+            KeyError: If `event_type` is not in SEARCH_CONFIG.
+            RuntimeError: If the archive could not be downloaded.
+        """
+        coords = canonical_coords(city_coords, config.OPEN_METEO_ARCHIVE_URL)
+        today = date.today()
+        settled_end = today - timedelta(days=config.ARCHIVE_SETTLED_LAG_DAYS)
+
+        # Unsettled days are matched on the fly from the cached recent frames
+        recent = self._scan(coords, settled_end + timedelta(days=1), today)[event_type]
+
+        with self._lock(coords):
+            meta, events = self._updated(coords, settled_end)
+            if len(recent.days) == 0:
+                meta, events = self._extended_back(coords, meta, events, self._horizon(today), until_match=event_type)
+
+        occurrences = events[event_type].extend(recent)
+        start = date.fromisoformat(meta["start"])
+        if len(occurrences.days) == 0:
+            return None, start
+        return (date.fromordinal(int(occurrences.days[-1])), float(occurrences.values[-1])), start
+
+    def count(self, city_coords: List[float], event_type: str, first: date, last: date) -> Tuple[int, date]:
+        """Returns (number of matching days in [first, last], first day covered).
+
+        Raises:
+            KeyError: If `event_type` is not in SEARCH_CONFIG.
+            RuntimeError: If the archive could not be downloaded.
+        """
+        coords = canonical_coords(city_coords, config.OPEN_METEO_ARCHIVE_URL)
+        today = date.today()
+        settled_end = today - timedelta(days=config.ARCHIVE_SETTLED_LAG_DAYS)
+
+        with self._lock(coords):
+            meta, events = self._updated(coords, settled_end)
+            meta, events = self._extended_back(coords, meta, events, max(first, self._horizon(today)))
+
+        occurrences = events[event_type]
+        if last > settled_end:
+            occurrences = occurrences.extend(self._scan(coords, settled_end + timedelta(days=1), today)[event_type])
+
+        days = occurrences.days
+        lo = np.searchsorted(days, first.toordinal(), side="left")
+        hi = np.searchsorted(days, last.toordinal(), side="right")
+        return int(hi - lo), date.fromisoformat(meta["start"])
@@ -0,0 +1,193 @@
+import math
+import numpy as np
+from typing import Any, Dict, List, Sequence, Set, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    h = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+def haversine_km_array(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distances from one point to arrays of points, in kilometres."""
+    phi1, phi2 = math.radians(lat), np.radians(lats)
+    d_phi = phi2 - phi1
+    d_lambda = np.radians(lons - lon)
+    h = np.sin(d_phi / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(h)))
+
+
+class GeoGrid:
+    """Uniform lat/lon bucket grid for nearest-neighbour and radius queries.
+
+    Points are bucketed into square cells of `cell_deg` degrees. Queries scan
+    rings of cells outwards from the query cell and stop as soon as no unseen
+    cell can hold a closer point, so only a handful of cells are visited.
+    Queries far from the data, where the rings would outnumber the occupied
+    cells, fall back to one vectorized distance computation over all points.
+    Near the antimeridian, rings are also scanned around the query's image
+    one turn around the globe, so points just across it are found.
+    Occupied cells are kept as sorted keys with CSR point ids, so the grid
+    converts to flat arrays for the compiled city database and back.
+    """
+
+    def __init__(self, points: Sequence[Sequence[float]], cell_deg: float) -> None:
+        self.cell_deg = cell_deg
+        self._lats = np.array([float(p[0]) for p in points], dtype=np.float64)
+        self._lons = np.array([float(p[1]) for p in points], dtype=np.float64)
+
+        rows = np.floor(self._lats / cell_deg).astype(np.int64)
+        cols = np.floor(self._lons / cell_deg).astype(np.int64)
+        keys = self._key(rows, cols)
+        order = np.argsort(keys, kind="stable")
+        self._cell_keys, starts = np.unique(keys[order], return_index=True)
+        self._cell_offsets = np.append(starts, len(order)).astype(np.int64)
+        self._cell_ids = order.astype(np.int32)
+        self._set_ranges()
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Flat arrays holding the whole grid, for `from_arrays`."""
+        return {
+            "cell_deg": np.array([self.cell_deg]), "lats": self._lats, "lons": self._lons,
+            "cell_keys": self._cell_keys, "cell_offsets": self._cell_offsets, "cell_ids": self._cell_ids
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "GeoGrid":
+        """Wraps arrays from `to_arrays` (e.g. memory-mapped) without copying them."""
+        grid = cls.__new__(cls)
+        grid.cell_deg = float(arrays["cell_deg"][0])
+        grid._lats, grid._lons = arrays["lats"], arrays["lons"]
+        grid._cell_keys, grid._cell_offsets, grid._cell_ids = (
+            arrays["cell_keys"], arrays["cell_offsets"], arrays["cell_ids"]
+        )
+        grid._set_ranges()
+        return grid
+
+    def _set_ranges(self) -> None:
+        keys = self._cell_keys if len(self._cell_keys) else np.zeros(1, dtype=np.int64)
+        # The low 32 bits hold the column as a signed value; a negative one borrows from the row
+        cols = ((keys + (1 << 31)) & 0xFFFFFFFF) - (1 << 31)
+        rows = (keys - cols) >> 32
+        self._row_range = (int(rows.min()), int(rows.max()))
+        self._col_range = (int(cols.min()), int(cols.max()))
+
+    @staticmethod
+    def _key(rows: Any, cols: Any) -> Any:
+        """Encodes (row, col) cells as int64 keys that sort like the tuples."""
+        return (np.asarray(rows, dtype=np.int64) << 32) + np.asarray(cols, dtype=np.int64)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def _points_in(self, cells: Sequence[Tuple[int, int]]) -> np.ndarray:
+        """Ids of the points in the given cells."""
+        if not len(self._cell_keys) or not cells:
+            return np.empty(0, dtype=np.int32)
+
+        keys = self._key([cell[0] for cell in cells], [cell[1] for cell in cells])
+        pos = np.minimum(np.searchsorted(self._cell_keys, keys), len(self._cell_keys) - 1)
+        occupied = pos[self._cell_keys[pos] == keys]
+        if len(occupied) == 0:
+            return np.empty(0, dtype=np.int32)
+        return np.concatenate([self._cell_ids[self._cell_offsets[p]:self._cell_offsets[p + 1]] for p in occupied])
+
+    def _distances(self, lat: float, lon: float, ids: np.ndarray) -> List[Tuple[float, int]]:
+        distances = haversine_km_array(lat, lon, self._lats[ids], self._lons[ids])
+        return list(zip(distances.tolist(), ids.tolist()))
+
+    def _ring(self, row: int, col: int, r: int) -> List[Tuple[int, int]]:
+        """Cells at Chebyshev distance exactly `r` from (row, col)."""
+        if r == 0:
+            return [(row, col)]
+        cells = [(row + dr, col + dc) for dr in (-r, r) for dc in range(-r, r + 1)]
+        cells += [(row + dr, col + dc) for dc in (-r, r) for dr in range(-r + 1, r)]
+        return cells
+
+    def _outside_bound_km(self, row: int, r: int) -> float:
+        """Lower bound on the distance to any point outside the first `r` rings."""
+        delta = r * self.cell_deg
+        lat_bound = delta * KM_PER_DEGREE
+
+        # Points beyond the ring only in longitude lie within these latitudes
+        max_abs_lat = min(90.0, max(abs((row - r) * self.cell_deg), abs((row + r + 1) * self.cell_deg)))
+        half_lon = math.radians(min(delta, 180.0)) / 2
+        lon_bound = 2 * EARTH_RADIUS_KM * math.asin(math.cos(math.radians(max_abs_lat)) * math.sin(half_lon))
+
+        return min(lat_bound, lon_bound)
+
+    def _centers(self, lat: float, lon: float) -> List[Tuple[int, int]]:
+        """The query cell and the cell of its image 360° towards the nearer side of the antimeridian."""
+        return [self._cell(lat, lon), self._cell(lat, lon - 360.0 if lon > 0 else lon + 360.0)]
+
+    def _max_ring(self, row: int, col: int) -> int:
+        return max(
+            abs(row - self._row_range[0]), abs(row - self._row_range[1]),
+            abs(col - self._col_range[0]), abs(col - self._col_range[1])
+        )
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> List[Tuple[int, float]]:
+        """Returns up to `k` (point id, distance km) pairs, closest first."""
+        if k <= 0 or not len(self._lats):
+            return []
+
+        centers = self._centers(lat, lon)
+        row = centers[0][0]
+        found: List[Tuple[float, int]] = []
+        visited: Set[Tuple[int, int]] = set()
+
+        # Every occupied cell is within this many rings of one of the centers
+        for r in range(min(self._max_ring(*center) for center in centers) + 1):
+            if (2 * r + 1) ** 2 > len(self._cell_keys):
+                return self._nearest_brute_force(lat, lon, k)
+
+            cells = [cell for center in centers for cell in self._ring(*center, r) if cell not in visited]
+            visited.update(cells)
+            found += self._distances(lat, lon, self._points_in(cells))
+
+            if len(found) >= k:
+                found.sort()
+                del found[k:]
+                if found[-1][0] <= self._outside_bound_km(row, r):
+                    break
+
+        found.sort()
+        return [(idx, dist) for dist, idx in found[:k]]
+
+    def _nearest_brute_force(self, lat: float, lon: float, k: int) -> List[Tuple[int, float]]:
+        distances = haversine_km_array(lat, lon, self._lats, self._lons)
+        ids = np.argsort(distances, kind="stable")[:k]
+        return [(int(idx), float(distances[idx])) for idx in ids]
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[Tuple[int, float]]:
+        """Returns all (point id, distance km) pairs within `radius_km`, closest first."""
+        if radius_km < 0 or not len(self._lats):
+            return []
+
+        d_lat = radius_km / KM_PER_DEGREE
+        max_abs_lat = abs(lat) + d_lat
+        d_lon = 360.0 if max_abs_lat >= 90 else min(360.0, d_lat / math.cos(math.radians(max_abs_lat)))
+
+        row_lo = max(self._cell(lat - d_lat, lon)[0], self._row_range[0])
+        row_hi = min(self._cell(lat + d_lat, lon)[0], self._row_range[1])
+
+        # The longitude window, and its parts wrapping past the antimeridian
+        cells: Set[Tuple[int, int]] = set()
+        for shift in (-360.0, 0.0, 360.0):
+            col_lo = max(self._cell(lat, lon + shift - d_lon)[1], self._col_range[0])
+            col_hi = min(self._cell(lat, lon + shift + d_lon)[1], self._col_range[1])
+            cells.update(
+                (cell_row, cell_col) for cell_row in range(row_lo, row_hi + 1) for cell_col in range(col_lo, col_hi + 1)
+            )
+
+        found = [(dist, idx) for dist, idx in self._distances(lat, lon, self._points_in(sorted(cells))) if dist <= radius_km]
+
+        found.sort()
+        return [(idx, dist) for dist, idx in found]
@@ -1,37 +1,195 @@
-from typing import Tuple, Optional, List
-from thefuzz import process, fuzz
-from settings.cities import CITY_COORDINATES
+import re
+import numpy as np
+from collections import Counter
+from functools import cached_property
+from typing import Tuple, Optional, List, Dict, Sequence
+from rapidfuzz import process as rf_process, fuzz as rf_fuzz
+from rapidfuzz.utils import default_process
 from settings import config
+from services.city_db import CitySource, load_city_source
+from services.city_index import TrigramIndex, FoldedNameTable
+from services.geo_index import GeoGrid
+
+# "52.23, 21.01" / "52.23 21.01" style coordinate input
+_COORDINATE_QUERY = re.compile(r"^\s*(-?\d{1,2}(?:\.\d+)?)\s*[,;\s]\s*(-?\d{1,3}(?:\.\d+)?)\s*$")
+
+# (City Name, [lat, lon]) or (None, None)
+CityMatch = Tuple[Optional[str], Optional[List[float]]]
+
+# (City Name, [lat, lon], distance in km)
+NearbyCity = Tuple[str, List[float], float]
 
 
 class LocationFinder:
-    """Service for resolving fuzzy city names to geo-coordinates."""
+    """Service for resolving fuzzy city names to geo-coordinates.
+
+    Lookup structures come prebuilt with a compiled city database and are
+    otherwise built on first use, so construction only opens the city source.
+    """
+
+    def __init__(self, source: Optional[CitySource] = None) -> None:
+        self.source: CitySource = source if source is not None else load_city_source()
+        self.stats: Counter = Counter()
+
+    @cached_property
+    def city_names(self) -> Sequence[str]:
+        return self.source.names()
 
-    def __init__(self) -> None:
-        self.city_names: List[str] = list(CITY_COORDINATES.keys())
+    @cached_property
+    def index(self) -> TrigramIndex:
+        arrays = self.source.sections("trigram")
+        return TrigramIndex.from_arrays(arrays) if arrays else TrigramIndex(self.city_names)
 
-    def find_coordinates(self, city_query: str) -> Tuple[Optional[str], Optional[List[float]]]:
+    @cached_property
+    def exact_names(self) -> FoldedNameTable:
+        arrays = self.source.sections("folded")
+        return FoldedNameTable.from_arrays(arrays) if arrays else FoldedNameTable(self.city_names)
+
+    @cached_property
+    def geo_index(self) -> GeoGrid:
+        arrays = self.source.sections("geo")
+        if arrays and float(arrays["cell_deg"][0]) == config.GEO_GRID_CELL_DEG:
+            return GeoGrid.from_arrays(arrays)
+        return GeoGrid(self.source.points(), config.GEO_GRID_CELL_DEG)
+
+    def _match(self, idx: int) -> CityMatch:
+        return self.city_names[idx], self.source.coordinates(idx)
+
+    def _resolve_direct(self, city_query: str) -> Optional[CityMatch]:
+        """Resolves coordinate input and exact names without fuzzy matching.
+
+        Returns:
+            Optional[CityMatch]: The match, or None if fuzzy matching is needed.
+        """
+        # Coordinate input: reverse geocode to the nearest known city, keep the exact point.
+        # Points far from every known city keep a neutral coordinate label instead.
+        coordinate_match = _COORDINATE_QUERY.match(city_query)
+        if coordinate_match:
+            lat, lon = float(coordinate_match.group(1)), float(coordinate_match.group(2))
+            if -90 <= lat <= 90 and -180 <= lon <= 180:
+                self.stats["coordinate_lookups"] += 1
+                nearest = self.nearest(lat, lon, k=1)
+                if nearest and nearest[0][2] <= config.REVERSE_GEOCODE_MAX_KM:
+                    return nearest[0][0], [lat, lon]
+                return f"{lat:.2f}, {lon:.2f}", [lat, lon]
+
+        # Fast path: exact name modulo case, diacritics and qualifiers ("lodz", "Zywiec")
+        exact_id = self.exact_names.get(city_query)
+        if exact_id is not None:
+            self.stats["exact_hits"] += 1
+            return self._match(exact_id)
+
+        return None
+
+    def find_coordinates(self, city_query: str) -> CityMatch:
         """Matches a user provided city string to the database.
 
         Args:
             city_query: The city name extracted from user input.
 
         Returns:
-            Tuple[Optional[str], Optional[List[float]]]:
-                (City Name, [lat, lon]) if found, otherwise (None, None).
+            CityMatch: (City Name, [lat, lon]) if found, otherwise (None, None).
         """
         if not city_query:
             return None, None
 
-        best_match = process.extractOne(
-            city_query,
-            self.city_names,
-            scorer=fuzz.ratio
-        )
+        self.stats["lookups"] += 1
+
+        direct = self._resolve_direct(city_query)
+        if direct is not None:
+            return direct
+
+        self.stats["fuzzy_lookups"] += 1
+
+        # Trigram candidates first, then only the names that could still score as well
+        best_match = self.index.best_match(city_query, self.city_names, config.FUZZY_CANDIDATE_LIMIT)
 
         if best_match and best_match[1] >= config.FUZZY_MATCH_THRESHOLD:
-            city_name = best_match[0]
-            coordinates = CITY_COORDINATES[city_name]
-            return city_name, coordinates
+            return self._match(best_match[2])
+
+        return None, None
+
+    def find_coordinates_batch(self, city_queries: Sequence[str]) -> List[CityMatch]:
+        """Matches many city strings at once.
+
+        Coordinate and exact-name queries take the same fast paths as
+        `find_coordinates`. The remaining distinct queries are scored against
+        every city name as one score matrix (rapidfuzz `cdist` on all cores),
+        using the same scorer and `FUZZY_MATCH_THRESHOLD` as the single-query call.
 
-        return None, None
\ No newline at end of file
+        Args:
+            city_queries: City names, e.g. from an offline job.
+
+        Returns:
+            List[CityMatch]: (City Name, [lat, lon]) or (None, None) per query, in input order.
+        """
+        results: List[CityMatch] = [(None, None)] * len(city_queries)
+        pending: Dict[str, List[int]] = {}
+
+        for pos, city_query in enumerate(city_queries):
+            if not city_query:
+                continue
+            self.stats["lookups"] += 1
+            direct = self._resolve_direct(city_query)
+            if direct is not None:
+                results[pos] = direct
+            else:
+                self.stats["fuzzy_lookups"] += 1
+                pending.setdefault(city_query, []).append(pos)
+
+        unique_queries = list(pending)
+        chunk = config.BATCH_MATCH_CHUNK_SIZE
+
+        for offset in range(0, len(unique_queries), chunk):
+            block = unique_queries[offset:offset + chunk]
+            scores = rf_process.cdist(
+                block,
+                self.city_names,
+                scorer=rf_fuzz.ratio,
+                processor=default_process,
+                dtype=np.float64,
+                workers=config.BATCH_MATCH_WORKERS
+            )
+            best_ids = scores.argmax(axis=1)
+            # thefuzz reports rounded ratios; apply the threshold the same way
+            best_scores = np.rint(scores[np.arange(len(block)), best_ids])
+
+            for city_query, best_id, best_score in zip(block, best_ids, best_scores):
+                if best_score < config.FUZZY_MATCH_THRESHOLD:
+                    continue
+                for pos in pending[city_query]:
+                    results[pos] = self._match(int(best_id))
+
+        return results
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> List[NearbyCity]:
+        """Finds the `k` cities closest to a point.
+
+        Args:
+            lat: Latitude in degrees.
+            lon: Longitude in degrees.
+            k: Number of cities to return.
+
+        Returns:
+            List[NearbyCity]: (City Name, [lat, lon], distance km) tuples, closest first.
+        """
+        return [
+            (*self._match(idx), round(dist, 2))
+            for idx, dist in self.geo_index.nearest(lat, lon, k)
+        ]
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[NearbyCity]:
+        """Finds all cities within `radius_km` of a point.
+
+        Args:
+            lat: Latitude in degrees.
+            lon: Longitude in degrees.
+            radius_km: Search radius in kilometres.
+
+        Returns:
+            List[NearbyCity]: (City Name, [lat, lon], distance km) tuples, closest first.
+        """
+        return [
+            (*self._match(idx), round(dist, 2))
+            for idx, dist in self.geo_index.within(lat, lon, radius_km)
+        ]
@@ -0,0 +1,193 @@
+import json
+import logging
+import os
+import threading
+import time
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from data.archive_store import ArchiveStore
+from data.data_getter import get_historical_weather_data
+from data.grid import canonical_coords
+from settings import config
+
+logger = logging.getLogger("NeuroWeather")
+
+# (value, day) of an extreme
+Record = Tuple[float, date]
+
+
+def year_chunks(start: date, end: date, years: int) -> List[Tuple[date, date]]:
+    """Splits [start, end] into consecutive ranges of `years` calendar years, newest first."""
+    chunks = []
+    chunk_start = start
+    while chunk_start <= end:
+        next_start = date(chunk_start.year + years, 1, 1)
+        chunks.append((chunk_start, min(next_start - timedelta(days=1), end)))
+        chunk_start = next_start
+    return chunks[::-1]
+
+
+def iter_archive_chunks(coords: List[float], start: date, end: date, columns: List[str]) -> Iterator[pd.DataFrame]:
+    """Downloads [start, end] in RECORD_CHUNK_YEARS chunks concurrently, yielding non-empty frames as they arrive.
+
+    Chunks bypass the archive store and are released once consumed, so peak
+    memory is a few chunks rather than the whole range.
+
+    Raises:
+        RuntimeError: If a chunk could not be downloaded.
+    """
+    with ThreadPoolExecutor(max_workers=config.RECORD_FETCH_WORKERS) as pool:
+        # Submitted newest first; a finished future is dropped before its frame is yielded
+        pending = dict.fromkeys(
+            pool.submit(get_historical_weather_data, str(first), str(last), coords, columns, use_store=False)
+            for first, last in year_chunks(start, end, config.RECORD_CHUNK_YEARS)
+        )
+        for future in as_completed(list(pending)):
+            del pending[future]
+            df = future.result()
+            if isinstance(df, dict):
+                for other in pending:
+                    other.cancel()
+                raise RuntimeError(df.get("reason", "archive request failed"))
+            if not df.empty:
+                yield df
+
+
+def chunk_extreme(df: pd.DataFrame, col: str, method: str) -> Optional[Record]:
+    """Reduces one frame to its (value, day) extreme; the earliest day wins ties."""
+    values = pd.to_numeric(df[col], errors='coerce')
+    if values.isna().all():
+        return None
+    idx = values.idxmax() if method == "max" else values.idxmin()
+    return float(values[idx]), df.loc[idx, 'date'].date()
+
+
+def better_record(current: Optional[Record], candidate: Optional[Record], method: str) -> Optional[Record]:
+    """Combines two partial extremes; equal values keep the earlier day."""
+    if current is None or candidate is None:
+        return current or candidate
+
+    # Sign flips min into max
+    sign = 1 if method == "max" else -1
+    return candidate if (sign * candidate[0], current[1]) > (sign * current[0], candidate[1]) else current
+
+
+class RecordIndex:
+    """Materialized all-time extremes per archive grid cell, for every RECORD_CONFIG entry.
+
+    Each cell's table is built once by a chunked, parallel scan of the
+    archive since RECORD_SEARCH_START and saved as JSON. Later queries only
+    scan the settled days added since (normally none). The extremes of the
+    few recent days the reanalysis may still revise are kept in memory for
+    ARCHIVE_RECENT_TTL, like the recent archive frames they come from.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        # Per cell: (monotonic expiry, settled end, extremes of the days after it)
+        self._recent: Dict[str, Tuple[float, date, Dict[str, Optional[Record]]]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _path(self, coords: List[float]) -> str:
+        return os.path.join(self.root, f"{ArchiveStore.location_key(coords)}.json")
+
+    def _lock(self, coords: List[float]) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(ArchiveStore.location_key(coords), threading.Lock())
+
+    def _load(self, coords: List[float]) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(coords), encoding="utf-8") as fh:
+                entry = json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+        # A changed search start or new record types invalidate the table
+        if entry.get("start") != str(config.RECORD_SEARCH_START) or set(config.RECORD_CONFIG) - set(entry["records"]):
+            return None
+        return entry
+
+    def _save(self, coords: List[float], entry: Dict[str, Any]) -> None:
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            path = self._path(coords)
+            with open(f"{path}.tmp", "w", encoding="utf-8") as fh:
+                json.dump(entry, fh)
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            logger.warning(f"Record index not saved: {e}")
+
+    @staticmethod
+    def _scan(coords: List[float], start: date, end: date) -> Dict[str, Optional[Record]]:
+        """Reduces [start, end] to every configured extreme.
+
+        Raises:
+            RuntimeError: If a chunk could not be downloaded.
+        """
+        columns = [col for col in config.DAILY_VARIABLES if any(cfg["col"] == col for cfg in config.RECORD_CONFIG.values())]
+        best: Dict[str, Optional[Record]] = {record_type: None for record_type in config.RECORD_CONFIG}
+
+        for df in iter_archive_chunks(coords, start, end, columns):
+            for record_type, cfg in config.RECORD_CONFIG.items():
+                partial = chunk_extreme(df, cfg["col"], cfg["method"])
+                best[record_type] = better_record(best[record_type], partial, cfg["method"])
+
+        return best
+
+    def lookup(self, city_coords: List[float], record_type: str) -> Optional[Record]:
+        """Returns the all-time extreme for `record_type`, or None if there is no valid data.
+
+        Raises:
+            KeyError: If `record_type` is not in RECORD_CONFIG.
+            RuntimeError: If the archive could not be downloaded.
+        """
+        method = config.RECORD_CONFIG[record_type]["method"]
+        coords = canonical_coords(city_coords, config.OPEN_METEO_ARCHIVE_URL)
+        today = date.today()
+        settled_end = today - timedelta(days=config.ARCHIVE_SETTLED_LAG_DAYS)
+
+        with self._lock(coords):
+            entry = self._load(coords) or {
+                "start": str(config.RECORD_SEARCH_START),
+                "through": str(config.RECORD_SEARCH_START - timedelta(days=1)),
+                "records": {}
+            }
+
+            through = date.fromisoformat(entry["through"])
+            if through < settled_end:
+                logger.info(f"Updating record index for {coords} ({through + timedelta(days=1)} to {settled_end}).")
+                scanned = self._scan(coords, through + timedelta(days=1), settled_end)
+                for name, cfg in config.RECORD_CONFIG.items():
+                    stored = entry["records"].get(name)
+                    current = (stored["value"], date.fromisoformat(stored["date"])) if stored else None
+                    merged = better_record(current, scanned[name], cfg["method"])
+                    entry["records"][name] = {"value": merged[0], "date": str(merged[1])} if merged else None
+                entry["through"] = str(settled_end)
+                self._save(coords, entry)
+
+            recent = self._recent_extremes(coords, settled_end, today)
+
+        stored = entry["records"].get(record_type)
+        settled = (stored["value"], date.fromisoformat(stored["date"])) if stored else None
+        return better_record(settled, recent[record_type], method)
+
+    def _recent_extremes(self, coords: List[float], settled_end: date, today: date) -> Dict[str, Optional[Record]]:
+        """Extremes of the unsettled days after `settled_end`; the caller holds the cell's lock.
+
+        Unsettled days are never persisted; their extremes are rescanned once
+        ARCHIVE_RECENT_TTL has passed or a day has settled.
+
+        Raises:
+            RuntimeError: If the archive could not be downloaded.
+        """
+        key = ArchiveStore.location_key(coords)
+        cached = self._recent.get(key)
+        if cached is not None and cached[0] > time.monotonic() and cached[1] == settled_end:
+            return cached[2]
+
+        recent = self._scan(coords, settled_end + timedelta(days=1), today)
+        self._recent[key] = time.monotonic() + config.ARCHIVE_RECENT_TTL, settled_end, recent
+        return recent
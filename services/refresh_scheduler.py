@@ -0,0 +1,108 @@
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Set, Tuple
+from data.data_getter import forecast_demand, forecast_expires_in, refresh_forecast
+from data.rate_limit import RateLimiter
+from settings import config
+
+logger = logging.getLogger("NeuroWeather")
+
+# (latitude, longitude, forecast_days, granularity) of a canonical forecast request
+Cell = Tuple[float, float, int, str]
+
+
+class RefreshAheadScheduler:
+    """Background thread keeping the forecasts of the hottest grid cells cached.
+
+    Every pass ranks cells by decayed request frequency, and re-downloads the
+    top-K ones whose cached forecast expires within REFRESH_AHEAD_LEAD_SECONDS,
+    has expired or has been evicted, so hot cells are replaced before users
+    see them expire. The thread sleeps until the next hot entry enters that
+    window (at most REFRESH_AHEAD_INTERVAL). Downloads run on a small pool
+    and are capped by an hourly upstream budget.
+    """
+
+    def __init__(
+            self,
+            top_k: int = config.REFRESH_AHEAD_TOP_K,
+            workers: int = config.REFRESH_AHEAD_WORKERS,
+            budget_per_hour: float = config.REFRESH_AHEAD_BUDGET_PER_HOUR
+    ) -> None:
+        self.top_k = top_k
+        self.budget = RateLimiter(budget_per_hour / 3600, burst=top_k)
+        self.stats: Counter = Counter()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="refresh-ahead")
+        self._pending: Set[Cell] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Starts the scheduler thread (no-op if already running)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="refresh-ahead-scheduler", daemon=True)
+        self._thread.start()
+        logger.info(f"Refresh-ahead scheduler started (top {self.top_k} cells).")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stops the thread; downloads already started are allowed to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                wait = self.run_once()
+            except Exception as e:
+                logger.error(f"Refresh-ahead pass failed: {e}")
+                wait = config.REFRESH_AHEAD_INTERVAL
+            self._stop.wait(wait)
+
+    def run_once(self) -> float:
+        """Schedules refreshes for due hot cells.
+
+        Returns:
+            float: Seconds until the next pass is needed.
+        """
+        self.stats["passes"] += 1
+        next_pass = float(config.REFRESH_AHEAD_INTERVAL)
+
+        for cell, _ in forecast_demand.hottest(self.top_k, config.REFRESH_AHEAD_MIN_SCORE):
+            expires_in = forecast_expires_in(cell[:2], cell[2], cell[3])
+            if expires_in is not None and expires_in > config.REFRESH_AHEAD_LEAD_SECONDS:
+                next_pass = min(next_pass, expires_in - config.REFRESH_AHEAD_LEAD_SECONDS)
+                continue
+
+            with self._lock:
+                if cell in self._pending:
+                    continue
+                if not self.budget.try_acquire():
+                    self.stats["over_budget"] += 1
+                    break
+                self._pending.add(cell)
+            self._pool.submit(self._refresh, cell)
+
+        # Never spin: cells due within a second are picked up on the next pass
+        return max(1.0, next_pass)
+
+    def _refresh(self, cell: Cell) -> None:
+        try:
+            refresh_forecast(cell[:2], cell[2], cell[3])
+            self.stats["refreshed"] += 1
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.warning(f"Refresh-ahead of {cell} failed: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(cell)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pass, refresh and budget counters."""
+        with self._lock:
+            return {**self.stats, "pending": len(self._pending)}
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, Dict, List, Tuple
+
+# Comparison kernels by SEARCH_CONFIG operator
+_OPERATORS: Dict[str, Callable[[np.ndarray, Any], np.ndarray]] = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    "in": lambda values, threshold: np.isin(values, threshold)
+}
+
+# (column, operator, threshold) of one comparison; thresholds are made hashable
+_Predicate = Tuple[str, str, Any]
+
+
+def _run_reaches(mask: np.ndarray, min_days: int) -> np.ndarray:
+    """Marks the day each run of consecutive True values reaches `min_days`, once per run.
+
+    Rows before the first are treated as False, so a run already under way
+    at the start of the block is only told apart with `min_days` rows of it
+    in view.
+    """
+    idx = np.arange(len(mask))
+    last_false = np.maximum.accumulate(np.where(mask, -1, idx))
+    return idx - last_false == min_days
+
+
+class RuleSet:
+    """SEARCH_CONFIG compiled into NumPy predicate kernels.
+
+    An event is either a single comparison (`col`, `op`, `val`) or a compound
+    rule: `all` or `any` over a list of comparisons. Either form may set
+    `min_days`, so that a run of at least that many consecutive matching
+    days (a spell) counts once, on the day it reaches that length. Every
+    distinct comparison is computed once per block and shared by all events
+    using it. Missing values never match.
+
+    Raises:
+        ValueError: On construction, if an event uses an unknown operator or
+            has no comparison.
+    """
+
+    def __init__(self, search_config: Dict[str, Dict[str, Any]]) -> None:
+        self.value_columns: Dict[str, str] = {}
+        self.min_days: Dict[str, int] = {}
+        self._rules: Dict[str, Tuple[str, List[int], int]] = {}
+        self._predicates: List[_Predicate] = []
+
+        for name, cfg in search_config.items():
+            combine = "any" if "any" in cfg else "all"
+            conditions = cfg.get(combine, [cfg])
+            if not conditions:
+                raise ValueError(f"Event '{name}' has no conditions")
+
+            indices = []
+            for condition in conditions:
+                if condition["op"] not in _OPERATORS:
+                    raise ValueError(f"Unknown operator '{condition['op']}' in event '{name}'")
+                threshold = condition["val"]
+                predicate = (condition["col"], condition["op"], tuple(threshold) if isinstance(threshold, list) else threshold)
+                if predicate not in self._predicates:
+                    self._predicates.append(predicate)
+                indices.append(self._predicates.index(predicate))
+
+            self._rules[name] = (combine, indices, int(cfg.get("min_days", 1)))
+            self.min_days[name] = self._rules[name][2]
+            self.value_columns[name] = cfg.get("col", conditions[0]["col"])
+
+    @property
+    def columns(self) -> List[str]:
+        """Every column a rule reads, in first-use order."""
+        names = [column for column, _, _ in self._predicates] + list(self.value_columns.values())
+        return list(dict.fromkeys(names))
+
+    @property
+    def lookback_days(self) -> int:
+        """Days of preceding data needed to evaluate the first day of a block exactly.
+
+        A spell rule needs `min_days` of them: `min_days - 1` to see a run
+        reach its length on the first day, plus one to tell whether the run
+        had reached it before.
+        """
+        return max((min_days for _, _, min_days in self._rules.values() if min_days > 1), default=0)
+
+    def evaluate(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Evaluates every event over a date-sorted daily frame in one pass.
+
+        Returns:
+            Dict[str, np.ndarray]: Boolean mask per event, aligned with the frame's rows.
+                Spell rules mark the day each spell reaches `min_days`.
+        """
+        values = {
+            column: pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64)
+            for column in dict.fromkeys(column for column, _, _ in self._predicates)
+        }
+        hits = np.stack([_OPERATORS[op](values[column], threshold) for column, op, threshold in self._predicates])
+
+        masks = {}
+        for name, (combine, indices, min_days) in self._rules.items():
+            selected = hits[indices]
+            mask = selected.any(axis=0) if combine == "any" else selected.all(axis=0)
+            masks[name] = _run_reaches(mask, min_days) if min_days > 1 else mask
+        return masks
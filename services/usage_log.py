@@ -0,0 +1,131 @@
+import atexit
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+from settings import config
+
+logger = logging.getLogger("NeuroWeather")
+
+_lock = threading.Lock()
+
+# Serializes flushes so an older snapshot never replaces a newer one
+_flush_lock = threading.Lock()
+
+# Aggregated counts per log path, loaded on first use: {city: {"count", "lat", "lon", "last"}}
+_counts: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+# Paths with counts not yet written out
+_dirty: Set[str] = set()
+
+_flusher: Optional[threading.Thread] = None
+
+
+def _read(path: str) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            entries = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    return entries if isinstance(entries, dict) else {}
+
+
+def _loaded(path: str) -> Dict[str, Dict[str, Any]]:
+    """In-memory counts for `path`, read from disk on first use. Call with `_lock` held."""
+    counts = _counts.get(path)
+    if counts is None:
+        counts = _counts[path] = _read(path)
+    return counts
+
+
+def _trim(counts: Dict[str, Dict[str, Any]]) -> None:
+    """Drops the least requested, least recent cities beyond USAGE_LOG_MAX_CITIES."""
+    excess = len(counts) - config.USAGE_LOG_MAX_CITIES
+    if excess > 0:
+        rank = lambda name: (counts[name]["count"], counts[name].get("last", 0))
+        for name in heapq.nsmallest(excess, counts, key=rank):
+            del counts[name]
+
+
+def _flush_periodically() -> None:
+    while True:
+        time.sleep(config.USAGE_LOG_FLUSH_SECONDS)
+        flush()
+
+
+def _start_flusher() -> None:
+    """Starts the background flusher on first use. Call with `_lock` held."""
+    global _flusher
+    if _flusher is None:
+        _flusher = threading.Thread(target=_flush_periodically, name="usage-log-flush", daemon=True)
+        _flusher.start()
+        atexit.register(flush)
+
+
+def record_usage(city_name: str, city_coords: List[float], path: Optional[str] = None) -> None:
+    """Counts one resolved city in the usage log.
+
+    Counts are kept in memory and written out every USAGE_LOG_FLUSH_SECONDS
+    and at exit, so a query only pays for a dictionary update. The log keeps
+    one aggregated entry per city, capped at USAGE_LOG_MAX_CITIES when flushed
+    (the least requested, least recent cities are dropped first), so it never
+    grows with traffic. Logging is best effort; failures never reach the caller.
+    """
+    path = path or config.USAGE_LOG_PATH
+    if not path:
+        return
+
+    with _lock:
+        entry = _loaded(path).setdefault(city_name, {"count": 0})
+        entry.update(count=entry["count"] + 1, lat=city_coords[0], lon=city_coords[1], last=int(time.time()))
+        _dirty.add(path)
+        _start_flusher()
+
+
+def flush() -> None:
+    """Writes out every usage log with unsaved counts."""
+    with _flush_lock:
+        with _lock:
+            pending = []
+            for path in _dirty:
+                counts = _counts[path]
+                _trim(counts)
+                pending.append((path, json.dumps(counts, ensure_ascii=False)))
+            _dirty.clear()
+
+        for path, text in pending:
+            try:
+                with open(f"{path}.tmp", "w", encoding="utf-8") as fh:
+                    fh.write(text)
+                os.replace(f"{path}.tmp", path)
+            except OSError as e:
+                logger.debug(f"Usage log unavailable: {e}")
+
+
+def top_cities(n: int, path: Optional[str] = None) -> List[Tuple[str, List[float]]]:
+    """Returns the `n` most requested cities in the usage log, including unsaved counts.
+
+    Args:
+        n: Number of cities.
+        path: Log file; defaults to config.USAGE_LOG_PATH.
+
+    Returns:
+        List[Tuple[str, List[float]]]: (name, [lat, lon]) pairs, most requested first.
+    """
+    path = path or config.USAGE_LOG_PATH
+    ranked = []
+
+    with _lock:
+        entries = list(_loaded(path).items())
+
+    for name, entry in entries:
+        try:
+            ranked.append((-int(entry["count"]), name, [float(entry["lat"]), float(entry["lon"])]))
+        except (ValueError, KeyError, TypeError):
+            continue
+
+    ranked.sort(key=lambda item: item[:2])
+    return [(name, coords) for _, name, coords in ranked[:n]]
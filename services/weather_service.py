@@ -1,13 +1,21 @@
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
-from typing import List
-from data.data_getter import get_hourly_forecast, get_historical_weather_data
+from typing import List, Optional
+from data.data_getter import get_daily_forecast, get_historical_weather_data
+from services.climatology import Climatology, anomaly_label, anomaly_score
+from services.event_index import EventIndex
+from services.record_index import RecordIndex
 from settings import config
 
 
 class WeatherService:
     """Domain service for interpreting weather data and generating context strings."""
 
+    record_index = RecordIndex(config.RECORD_INDEX_DIR)
+    event_index = EventIndex(config.EVENT_INDEX_DIR)
+    climatology = Climatology(config.CLIMATOLOGY_DIR)
+
     @staticmethod
     def _get_wmo_description(code: int) -> str:
         """Translates WMO integer code to string description."""
@@ -15,7 +23,7 @@ class WeatherService:
 
     @classmethod
     def find_historical_event(cls, city_coords: List[float], event_type: str) -> str:
-        """Searches for the last occurrence of a specific weather event.
+        """Looks up the last occurrence of a specific weather event in the per-location event index.
 
         Args:
             city_coords: [lat, lon]
@@ -28,47 +36,68 @@ class WeatherService:
         if not search_cfg:
             return f"Event type '{event_type}' is not configured."
 
-        today = date.today()
-        # Search window: 2 years (730 days)
-        df = get_historical_weather_data(str(today - timedelta(days=730)), str(today), city_coords)
-
-        if isinstance(df, dict) or df.empty:
+        try:
+            last_event, since = cls.event_index.last_occurrence(city_coords, event_type)
+        except RuntimeError:
             return "Error retrieving historical data."
 
-        col = search_cfg["col"]
-        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+        if last_event is None:
+            return f"No occurrence of {search_cfg['desc']} found since {since}."
 
-        # Apply filtering logic based on operator
-        operator = search_cfg["op"]
-        threshold = search_cfg["val"]
+        event_date, value = last_event
+        val_display = cls._get_wmo_description(value) if search_cfg["col"] == "weather_code" else round(value, 1)
 
-        if operator == ">":
-            matches = df[df[col] > threshold]
-        elif operator == "<":
-            matches = df[df[col] < threshold]
-        elif operator == "in":
-            matches = df[df[col].isin(threshold)]
-        else:
-            return "Invalid configuration operator."
+        spell = search_cfg.get("min_days", 1) > 1
+        return (
+            f"HISTORICAL ANALYSIS ({search_cfg['desc']}):\n"
+            f"{'Last spell started on' if spell else 'Last occurrence date:'} {event_date}\n"
+            f"Measured value{' on its first day' if spell else ''}: {val_display} {search_cfg.get('unit', '')}"
+        )
 
-        if matches.empty:
-            return f"No occurrence of {search_cfg['desc']} found in the last 2 years."
+    @classmethod
+    def count_event_occurrences(
+            cls,
+            city_coords: List[float],
+            event_type: str,
+            first: date,
+            last: Optional[date] = None
+    ) -> str:
+        """Counts the days a weather event occurred between two dates, using the per-location event index.
 
-        last_event = matches.sort_values(by='date', ascending=False).iloc[0]
-        val_display = last_event[col]
+        Events with `min_days` are counted as spells, by the day each spell started.
 
-        if col == "weather_code":
-            val_display = cls._get_wmo_description(val_display)
+        Args:
+            city_coords: [lat, lon]
+            event_type: Key from config.SEARCH_CONFIG (e.g., 'snow', 'rain').
+            first: First day of the period.
+            last: Last day of the period (default: today).
+
+        Returns:
+            str: Human-readable context string regarding the event.
+        """
+        search_cfg = config.SEARCH_CONFIG.get(event_type)
+        if not search_cfg:
+            return f"Event type '{event_type}' is not configured."
+
+        last = min(last or date.today(), date.today())
+        try:
+            count, since = cls.event_index.count(city_coords, event_type, first, last)
+        except RuntimeError:
+            return "Error retrieving historical data."
+
+        first = max(first, since)
+        if first > last:
+            return f"No data for this period (history available since {since})."
 
         return (
             f"HISTORICAL ANALYSIS ({search_cfg['desc']}):\n"
-            f"Last occurrence date: {last_event['date'].date()}\n"
-            f"Measured value: {val_display} {search_cfg.get('unit', '')}"
+            f"Period: {first} to {last}\n"
+            f"{'Spells' if search_cfg.get('min_days', 1) > 1 else 'Days'} with {search_cfg['desc']}: {count}"
         )
 
     @classmethod
     def find_all_time_record(cls, city_coords: List[float], record_type: str) -> str:
-        """Searches for weather records since 1960.
+        """Looks up a weather record since RECORD_SEARCH_START in the per-location record index.
 
         Args:
             city_coords: [lat, lon]
@@ -81,32 +110,43 @@ class WeatherService:
         if not record_cfg:
             return f"Record type '{record_type}' is not configured."
 
-        today = date.today()
-        start_date = "1960-01-01"
-
-        df = get_historical_weather_data(start_date, str(today), city_coords)
-
-        if isinstance(df, dict) or df.empty:
+        try:
+            record = cls.record_index.lookup(city_coords, record_type)
+        except RuntimeError:
             return "Error retrieving historical archive."
 
-        col = record_cfg["col"]
-        df[col] = pd.to_numeric(df[col], errors='coerce')
-
-        if record_cfg["method"] == "max":
-            idx = df[col].idxmax()
-        else:
-            idx = df[col].idxmin()
-
-        if pd.isna(idx):
+        if record is None:
             return "No valid data found for this record type."
 
-        record_row = df.loc[idx]
-        val = round(float(record_row[col]), 1)
+        value, day = record
+        return (
+            f"HISTORICAL RECORD (Since {config.RECORD_SEARCH_START.year} - {record_cfg['desc']}):\n"
+            f"Date: {day}\n"
+            f"Value: {round(value, 1)} {record_cfg['unit']}"
+        )
 
+    @classmethod
+    def _climate_comparison(cls, city_coords: List[float], day: date, row: pd.Series) -> str:
+        """Compares a report row with the climate normals of its calendar day ("" if not built yet)."""
+        if not config.CLIMATOLOGY_ENABLED:
+            return ""
+
+        anomalies = cls.climatology.anomalies(city_coords, day, row.to_dict())
+        if not anomalies:
+            return ""
+
+        lines = []
+        for column, value, normal in anomalies:
+            score = anomaly_score(value, normal)
+            lines.append(
+                f"{column}: {value:.1f} (normal {normal['mean']:.1f}, median {normal['p50']:.1f}, usual range "
+                f"{normal['p10']:.1f} to {normal['p90']:.1f}, {value - normal['mean']:+.1f}"
+                + (f", score {score:+.1f}" if score is not None else "")
+                + f", {anomaly_label(value, normal)})"
+            )
         return (
-            f"HISTORICAL RECORD (Since 1960 - {record_cfg['desc']}):\n"
-            f"Date: {record_row['date'].date()}\n"
-            f"Value: {val} {record_cfg['unit']}"
+            f"\nClimate Comparison ({config.CLIMATOLOGY_START.year}-{config.CLIMATOLOGY_END.year} normals):\n"
+            + "\n".join(lines)
         )
 
     @classmethod
@@ -125,7 +165,9 @@ class WeatherService:
         try:
             if query_date < today:
                 # Historical Query
-                df = get_historical_weather_data(str(query_date), str(query_date), city_coords)
+                df = get_historical_weather_data(
+                    str(query_date), str(query_date), city_coords, variables=config.REPORT_DAILY_VARIABLES
+                )
                 if isinstance(df, dict) or df.empty:
                     return "No data available for this date."
 
@@ -138,25 +180,126 @@ class WeatherService:
                     f"Temp Range: {row.get('temperature_2m_min', '?')}°C to {row.get('temperature_2m_max', '?')}°C\n"
                     f"Precipitation: {row.get('rain_sum', 0)} mm\n"
                     f"Max Wind: {row.get('wind_speed_10m_max', 0)} km/h"
-                )
+                ) + cls._climate_comparison(city_coords, query_date, row)
             else:
                 # Forecast Query
-                df = get_hourly_forecast(city_coords, forecast_days=16)
+                if query_date > today + timedelta(days=config.FORECAST_HORIZON_DAYS - 1):
+                    return f"Date {query_date} is out of forecast range (max {config.FORECAST_HORIZON_DAYS} days)."
+
+                df = get_daily_forecast(
+                    city_coords, str(query_date), str(query_date), variables=config.REPORT_DAILY_FORECAST_VARIABLES
+                )
                 if df.empty:
                     return "Forecast API error."
 
-                df['date'] = pd.to_datetime(df['date']).dt.date
-                day_data = df[df['date'] == query_date]
-
-                if day_data.empty:
-                    return f"Date {query_date} is out of forecast range (max 16 days)."
+                row = df.iloc[0]
 
                 return (
                     f"Forecast ({query_date}):\n"
-                    f"Temp Range: {day_data['temperature_2m'].min():.1f}°C to {day_data['temperature_2m'].max():.1f}°C\n"
-                    f"Precipitation Probability: {day_data['precipitation_probability'].max()}%\n"
-                    f"Max Wind: {day_data['wind_speed_10m'].max():.1f} km/h"
+                    f"Temp Range: {row['temperature_2m_min']:.1f}°C to {row['temperature_2m_max']:.1f}°C\n"
+                    f"Precipitation Probability: {row['precipitation_probability_max']:.0f}%\n"
+                    f"Max Wind: {row['wind_speed_10m_max']:.1f} km/h"
+                ) + cls._climate_comparison(city_coords, query_date, row)
+
+        except Exception as e:
+            return f"Data processing error: {str(e)}"
+
+    @staticmethod
+    def _with_local_day(df: pd.DataFrame, source: str) -> pd.DataFrame:
+        """Tags daily rows with their calendar day in the location's timezone and their origin."""
+        offset = pd.Timedelta(seconds=df.attrs.get("utc_offset_seconds", 0))
+        return df.assign(day=(df["date"] + offset).dt.date, source=source)
+
+    @staticmethod
+    def _fmt(value: float, unit: str) -> str:
+        """Formats a measurement to one decimal, or "n/a" when it is missing."""
+        return f"{value:.1f}{unit}" if pd.notna(value) else "n/a"
+
+    @classmethod
+    def get_range_report(cls, city_coords: List[float], date_from: date, date_to: date) -> str:
+        """Summarizes the weather over a date range, day by day and as a whole.
+
+        Past days come from the archive and the rest from the daily forecast;
+        when the range straddles today both are fetched concurrently, each as
+        a single request.
+
+        Args:
+            city_coords: [lat, lon]
+            date_from: First day of the range.
+            date_to: Last day of the range (clipped to the forecast horizon).
+
+        Returns:
+            str: Context string for the LLM.
+        """
+        today = date.today()
+        horizon_end = today + timedelta(days=config.FORECAST_HORIZON_DAYS - 1)
+
+        if date_to < date_from:
+            return "Invalid date range."
+        if date_from > horizon_end:
+            return f"Range starting {date_from} is out of forecast range (max {config.FORECAST_HORIZON_DAYS} days)."
+        date_to = min(date_to, horizon_end)
+        if (date_to - date_from).days + 1 > config.RANGE_REPORT_MAX_DAYS:
+            return f"Date range too long (max {config.RANGE_REPORT_MAX_DAYS} days)."
+
+        try:
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                jobs = {}
+                if date_from < today:
+                    jobs["history"] = pool.submit(
+                        get_historical_weather_data, str(date_from), str(min(date_to, today - timedelta(days=1))),
+                        city_coords, config.RANGE_REPORT_VARIABLES
+                    )
+                if date_to >= today:
+                    jobs["forecast"] = pool.submit(
+                        get_daily_forecast, city_coords, str(max(date_from, today)), str(date_to),
+                        config.RANGE_REPORT_VARIABLES
+                    )
+
+                frames = []
+                for source, job in jobs.items():
+                    df = job.result()
+                    if isinstance(df, dict) or df.empty:
+                        return "No data available for this period."
+                    frames.append(cls._with_local_day(df, source))
+
+            # Sums keep missing days missing instead of turning them into 0
+            daily = pd.concat(frames, ignore_index=True).groupby("day").agg(
+                condition=("weather_code", "max"),
+                temp_min=("temperature_2m_min", "min"),
+                temp_max=("temperature_2m_max", "max"),
+                rain=("rain_sum", lambda values: values.sum(min_count=1)),
+                snow=("snowfall_sum", lambda values: values.sum(min_count=1)),
+                wind_max=("wind_speed_10m_max", "max"),
+                source=("source", "first")
+            )
+
+            # Recent archive days may not be published yet
+            measured = ["condition", "temp_min", "temp_max", "rain", "snow", "wind_max"]
+            daily = daily.dropna(how="all", subset=measured)
+            if daily.empty:
+                return "No data available for this period."
+
+            lines = []
+            for day, row in daily.iterrows():
+                condition = cls._get_wmo_description(row.condition) if pd.notna(row.condition) else "Unknown"
+                lines.append(
+                    f"{day} ({row.source}): {condition}, {cls._fmt(row.temp_min, '°C')} to "
+                    f"{cls._fmt(row.temp_max, '°C')}, rain {cls._fmt(row.rain, ' mm')}, "
+                    f"snow {cls._fmt(row.snow, ' cm')}, max wind {cls._fmt(row.wind_max, ' km/h')}"
                 )
 
+            rain, wind = daily["rain"].dropna(), daily["wind_max"].dropna()
+            return (
+                f"Range Report ({daily.index[0]} to {daily.index[-1]}):\n"
+                f"Temp Range: {cls._fmt(daily['temp_min'].min(), '°C')} to {cls._fmt(daily['temp_max'].max(), '°C')}\n"
+                f"Total Rain: {cls._fmt(rain.sum(min_count=1), ' mm')}"
+                + (f" (wettest day {rain.idxmax()})" if not rain.empty else "") + "\n"
+                f"Total Snowfall: {cls._fmt(daily['snow'].sum(min_count=1), ' cm')}\n"
+                f"Max Wind: {cls._fmt(wind.max(), ' km/h')}"
+                + (f" (on {wind.idxmax()})" if not wind.empty else "") + "\n"
+                f"Daily:\n" + "\n".join(lines)
+            )
+
         except Exception as e:
-            return f"Data processing error: {str(e)}"
\ No newline at end of file
+            return f"Data processing error: {str(e)}"
@@ -1,4 +1,5 @@
 import os
+from datetime import date
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,16 +11,71 @@ LLM_MODEL_NAME = "llama-3.3-70b-versatile"
 OPEN_METEO_FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
 OPEN_METEO_ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
 
+# --- Grid Canonicalization ---
+# Requests are snapped to the nearest model grid node, so towns sharing a cell share fetches and cache entries
+GRID_SNAPPING_ENABLED = True
+GRID_RESOLUTION_DEG = {
+    OPEN_METEO_FORECAST_URL: 0.0625,  # ICON-EU
+    OPEN_METEO_ARCHIVE_URL: 0.1  # ERA5-Land
+}
+
 # --- Caching & Retries ---
 CACHE_NAME = ".cache"
-CACHE_EXPIRE_AFTER = 3600  # Seconds
+CACHE_EXPIRE_AFTER = 3600  # Seconds, default for requests without a specific policy
+ARCHIVE_RECENT_TTL = 3600  # Seconds, archive ranges reaching into the not yet settled days
+FORECAST_MODEL_RUN_HOURS_UTC = [0, 3, 6, 9, 12, 15, 18, 21]  # Forecasts expire when the next run is published
+FORECAST_AVAILABILITY_DELAY_MINUTES = 120  # Time from model run start to data available upstream
+FORECAST_MIN_TTL = 300  # Seconds
+FRAME_CACHE_MAX_BYTES = 64 * 1024 * 1024  # In-process cache of decoded DataFrames
+SWR_ENABLED = True  # Stale-while-revalidate for forecasts
+SWR_MAX_STALENESS = 1800  # Seconds past expiry a forecast is served while refreshing in background
+SWR_STALE_IF_ERROR = 6 * 3600  # Seconds past expiry a forecast is served when the upstream fails
+SWR_REFRESH_WORKERS = 2
 RETRY_COUNT = 5
 RETRY_BACKOFF = 0.2
 
+# --- Async Data Access ---
+ASYNC_CACHE_NAME = ".cache_async"  # aiohttp cache database (same expiry as CACHE_EXPIRE_AFTER)
+ASYNC_POOL_SIZE = 20  # Max pooled connections shared by all coroutines
+ASYNC_REQUEST_TIMEOUT = 60  # Seconds per attempt
+
+# --- Local Archive Store ---
+ARCHIVE_STORE_ENABLED = True
+ARCHIVE_STORE_DIR = ".archive"
+ARCHIVE_SETTLED_LAG_DAYS = 7  # Reanalysis days younger than this may still change and are never stored
+ARCHIVE_STORE_MAX_GAP_DAYS = 366  # Requests further than this from the stored range bypass the store
+ARCHIVE_BLOCK = "month"  # Archive downloads are widened to whole "day", "month" or "year" blocks
+
+# --- Cache Warm-up ---
+USAGE_LOG_PATH = "usage_log.json"  # Request counts per resolved city; empty string disables logging
+USAGE_LOG_MAX_CITIES = 5000  # Least requested cities are dropped beyond this
+USAGE_LOG_FLUSH_SECONDS = 60  # Counts are kept in memory and written out this often (and at exit)
+WARMUP_TOP_N = 50  # Cities taken from the usage log when none are given
+WARMUP_WORKERS = 4
+WARMUP_RATE_PER_SECOND = 5.0  # Upstream calls started per second
+WARMUP_ARCHIVE_DAYS = 365  # Recent archive days stored for history reports
+
+# --- Refresh-Ahead Scheduler (web process) ---
+REFRESH_AHEAD_ENABLED = True
+REFRESH_AHEAD_TOP_K = 20  # Hottest forecast grid cells kept fresh
+REFRESH_AHEAD_HALF_LIFE = 3600  # Seconds, decay of per-cell request frequency
+REFRESH_AHEAD_MIN_SCORE = 0.5  # Cells requested less than this (after decay) are not refreshed
+REFRESH_AHEAD_INTERVAL = 60  # Max seconds between scheduler passes
+REFRESH_AHEAD_LEAD_SECONDS = 120  # Hot forecasts are refreshed this long before they expire (keep below FORECAST_MIN_TTL)
+REFRESH_AHEAD_WORKERS = 2  # Concurrent refresh downloads
+REFRESH_AHEAD_BUDGET_PER_HOUR = 200  # Upstream requests the scheduler may spend per hour
+
 # --- Tooling Configuration ---
+CITY_DB_PATH = "cities.bin"  # Compiled city database (tools/build_city_db.py); falls back to settings/cities.py
 FUZZY_MATCH_THRESHOLD = 40  # Percent
+FUZZY_CANDIDATE_LIMIT = 64  # Trigram index candidates scored per query
+GEO_GRID_CELL_DEG = 0.25  # Cell size of the nearest-city spatial index
+REVERSE_GEOCODE_MAX_KM = 30.0  # Coordinate input farther than this from every city keeps a coordinate label
+BATCH_MATCH_CHUNK_SIZE = 1024  # Queries per score matrix in batch resolution
+BATCH_MATCH_WORKERS = -1  # Threads for batch scoring (-1 = all cores)
 
 # --- Data Fetching Parameters ---
+BATCH_LOCATION_CHUNK_SIZE = 100  # Locations per multi-location Open-Meteo request
 HOURLY_VARIABLES = [
     "temperature_2m", "precipitation_probability", "rain",
     "snowfall", "weather_code", "wind_speed_10m"
@@ -30,6 +86,23 @@ DAILY_VARIABLES = [
     "rain_sum", "snowfall_sum", "wind_speed_10m_max"
 ]
 
+# Daily aggregates computed upstream by the forecast API
+DAILY_FORECAST_VARIABLES = [
+    "weather_code", "temperature_2m_max", "temperature_2m_min", "precipitation_probability_max",
+    "rain_sum", "snowfall_sum", "wind_speed_10m_max"
+]
+FORECAST_HORIZON_DAYS = 16  # Furthest day the forecast API serves
+
+# Columns read by the WeatherService report templates; queries request only these
+REPORT_DAILY_VARIABLES = ["weather_code", "temperature_2m_max", "temperature_2m_min", "rain_sum", "wind_speed_10m_max"]
+REPORT_DAILY_FORECAST_VARIABLES = [
+    "temperature_2m_max", "temperature_2m_min", "precipitation_probability_max", "wind_speed_10m_max"
+]
+RANGE_REPORT_VARIABLES = [
+    "weather_code", "temperature_2m_max", "temperature_2m_min", "rain_sum", "snowfall_sum", "wind_speed_10m_max"
+]
+RANGE_REPORT_MAX_DAYS = 93  # Longest range accepted by the range report
+
 # --- Business Logic: WMO Weather Codes ---
 WMO_CODES = {
     0: "Clear sky", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
@@ -45,15 +118,30 @@ WMO_CODES = {
 }
 
 # --- Business Logic: Historical Search Configuration ---
+# Single comparisons or compound "all"/"any" rules; with "min_days", each run of that many or more
+# consecutive matching days is one spell, dated by its first day
 SEARCH_CONFIG = {
     "snow": {"col": "snowfall_sum", "op": ">", "val": 0.0, "desc": "snowfall", "unit": "cm"},
     "rain": {"col": "rain_sum", "op": ">", "val": 1.0, "desc": "noticeable rain", "unit": "mm"},
     "wind": {"col": "wind_speed_10m_max", "op": ">", "val": 50.0, "desc": "strong wind", "unit": "km/h"},
     "heat": {"col": "temperature_2m_max", "op": ">", "val": 30.0, "desc": "heatwave", "unit": "°C"},
     "frost": {"col": "temperature_2m_min", "op": "<", "val": -10.0, "desc": "severe frost", "unit": "°C"},
-    "hail": {"col": "weather_code", "op": "in", "val": [96, 99], "desc": "hail / hail storm", "unit": "(WMO Code)"}
+    "hail": {"col": "weather_code", "op": "in", "val": [96, 99], "desc": "hail / hail storm", "unit": "(WMO Code)"},
+    "dry_heat": {
+        "all": [{"col": "temperature_2m_max", "op": ">", "val": 30.0}, {"col": "rain_sum", "op": "<", "val": 0.1}],
+        "col": "temperature_2m_max", "desc": "hot day without rain", "unit": "°C"
+    },
+    "heat_spell": {
+        "col": "temperature_2m_max", "op": ">", "val": 30.0, "min_days": 3,
+        "desc": "3+ day heatwave above 30°C", "unit": "°C"
+    }
 }
 
+HISTORY_SEARCH_MAX_YEARS = 30  # Furthest look-back of an event index
+HISTORY_SEARCH_CHUNK_YEARS = 1  # First backward step of an event index; each further step doubles
+EVENT_INDEX_DIR = ".events"  # Per-location sorted event occurrence dates
+ARCHIVE_START_DATE = date(1940, 1, 1)  # First day served by the archive API
+
 # --- Business Logic: Record Search Configuration ---
 RECORD_CONFIG = {
     "min_temp": {"col": "temperature_2m_min", "method": "min", "desc": "Lowest temperature", "unit": "°C"},
@@ -63,6 +151,20 @@ RECORD_CONFIG = {
     "max_rain": {"col": "rain_sum", "method": "max", "desc": "Heaviest rainfall", "unit": "mm"}
 }
 
+RECORD_SEARCH_START = date(1960, 1, 1)
+RECORD_CHUNK_YEARS = 10  # Record and event index builds download the archive in chunks of this many calendar years
+RECORD_FETCH_WORKERS = 4  # Chunks downloaded concurrently
+RECORD_INDEX_DIR = ".records"  # Materialized per-location record tables
+
+# --- Business Logic: Climatology ---
+CLIMATOLOGY_ENABLED = True  # Compare reports with day-of-year normals
+CLIMATOLOGY_DIR = ".climatology"  # Per-location normals
+CLIMATOLOGY_START = date(1991, 1, 1)  # Baseline period (WMO climate normal)
+CLIMATOLOGY_END = date(2020, 12, 31)
+CLIMATOLOGY_WINDOW_DAYS = 7  # Days pooled on either side of each calendar day
+CLIMATOLOGY_BUILD_WORKERS = 1  # Background builds at a time; each downloads in RECORD_FETCH_WORKERS threads
+CLIMATOLOGY_VARIABLES = ["temperature_2m_max", "temperature_2m_min", "rain_sum", "snowfall_sum", "wind_speed_10m_max"]
+
 # --- LLM Prompts ---
 INTENT_PARSER_SYSTEM_PROMPT = """You are a precise intent classification parser for a weather system.
 Today is: {date_str}.
@@ -75,8 +177,13 @@ JSON FIELD SPECIFICATION:
    - Set to false for unrelated topics.
 2. 'city': string or null. The city name if specified.
 3. 'date': string (YYYY-MM-DD) or null.
+   - 'date_from' and 'date_to': strings (YYYY-MM-DD) or null. Set both, instead of 'date', when the user
+     asks about a period (e.g. "this week", "last month"); both days are inclusive.
 4. 'history_search': string or null. Use ONLY for past events.
-   - Allowed values: 'rain', 'snow', 'wind', 'heat', 'frost', 'hail'.
+   - Allowed values: 'rain', 'snow', 'wind', 'heat', 'frost', 'hail', 'dry_heat', 'heat_spell'.
+   - 'count_from': string (YYYY-MM-DD) or null. Set together with 'history_search' when the user asks
+     how many times / how often the event happened; the first day of the period (a year starts on Jan 1).
+   - 'count_to': string (YYYY-MM-DD) or null. Last day of that period, null for "until today".
 5. 'record_search': string or null. Use ONLY for superlative record queries.
    - Allowed values: 'min_temp', 'max_temp', 'max_wind', 'max_snow', 'max_rain'.
 
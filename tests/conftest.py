@@ -0,0 +1,10 @@
+import os
+import tempfile
+from settings import config
+
+# Modules under test open their HTTP cache and stores on import; keep them out of the working tree
+_scratch = tempfile.mkdtemp(prefix="neuroweather-tests-")
+config.CACHE_NAME = os.path.join(_scratch, "http_cache")
+config.ASYNC_CACHE_NAME = os.path.join(_scratch, "http_cache_async")
+config.ARCHIVE_STORE_DIR = os.path.join(_scratch, "archive")
+config.USAGE_LOG_PATH = ""
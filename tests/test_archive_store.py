@@ -0,0 +1,96 @@
+import json
+import os
+from datetime import date
+import numpy as np
+import pandas as pd
+from data.archive_store import ArchiveStore
+
+COORDS = [50.0, 20.0]
+COLUMNS = ["a", "b"]
+
+
+def _frame(start, days, base=0.0):
+    values = np.arange(days, dtype=np.float32) + base
+    return pd.DataFrame({
+        "a": values,
+        "b": values * 2,
+        "date": pd.date_range(pd.Timestamp(start, tz="UTC"), periods=days, freq="D")
+    })
+
+
+def test_roundtrip(tmp_path):
+    store = ArchiveStore(str(tmp_path))
+    assert store.coverage(COORDS, COLUMNS) is None
+
+    store.write(COORDS, _frame(date(2020, 1, 1), 10), COLUMNS)
+    assert store.coverage(COORDS, COLUMNS) == (date(2020, 1, 1), date(2020, 1, 10))
+
+    frame = store.read(COORDS, date(2020, 1, 3), date(2020, 1, 5), COLUMNS)
+    assert frame["a"].tolist() == [2.0, 3.0, 4.0]
+    assert frame["b"].tolist() == [4.0, 6.0, 8.0]
+    assert frame["date"].dt.date.tolist() == [date(2020, 1, 3), date(2020, 1, 4), date(2020, 1, 5)]
+
+
+def test_append_keeps_stored_rows(tmp_path):
+    store = ArchiveStore(str(tmp_path))
+    store.write(COORDS, _frame(date(2020, 1, 1), 10), COLUMNS)
+    # Overlaps the last 5 stored days with different values
+    store.write(COORDS, _frame(date(2020, 1, 6), 10, base=100.0), COLUMNS)
+
+    assert store.coverage(COORDS, COLUMNS) == (date(2020, 1, 1), date(2020, 1, 15))
+    values = store.read(COORDS, date(2020, 1, 1), date(2020, 1, 15), ["a"])["a"].tolist()
+    assert values == list(range(10)) + [105.0, 106.0, 107.0, 108.0, 109.0]
+
+
+def test_append_with_gap_is_ignored(tmp_path):
+    store = ArchiveStore(str(tmp_path))
+    store.write(COORDS, _frame(date(2020, 1, 1), 10), COLUMNS)
+    store.write(COORDS, _frame(date(2020, 1, 12), 5), COLUMNS)
+    assert store.coverage(COORDS, COLUMNS) == (date(2020, 1, 1), date(2020, 1, 10))
+
+    # Exactly adjacent extends the tail
+    store.write(COORDS, _frame(date(2020, 1, 11), 5), COLUMNS)
+    assert store.coverage(COORDS, COLUMNS) == (date(2020, 1, 1), date(2020, 1, 15))
+
+
+def test_prepend(tmp_path):
+    store = ArchiveStore(str(tmp_path))
+    store.write(COORDS, _frame(date(2020, 1, 10), 5, base=10.0), COLUMNS)
+    # Covers the new head, the stored range and a new tail
+    store.write(COORDS, _frame(date(2020, 1, 5), 15, base=100.0), COLUMNS)
+
+    assert store.coverage(COORDS, COLUMNS) == (date(2020, 1, 5), date(2020, 1, 19))
+    values = store.read(COORDS, date(2020, 1, 5), date(2020, 1, 19), ["a"])["a"].tolist()
+    assert values == [100.0, 101.0, 102.0, 103.0, 104.0] + [10.0, 11.0, 12.0, 13.0, 14.0] + [110.0, 111.0, 112.0, 113.0, 114.0]
+
+
+def test_prepend_with_gap_is_ignored(tmp_path):
+    store = ArchiveStore(str(tmp_path))
+    store.write(COORDS, _frame(date(2020, 1, 10), 5), COLUMNS)
+    store.write(COORDS, _frame(date(2020, 1, 1), 5), COLUMNS)
+    assert store.coverage(COORDS, COLUMNS) == (date(2020, 1, 10), date(2020, 1, 14))
+
+
+def test_columns_grow_independently(tmp_path):
+    store = ArchiveStore(str(tmp_path))
+    store.write(COORDS, _frame(date(2020, 1, 1), 10), ["a"])
+    assert store.coverage(COORDS, COLUMNS) is None
+
+    store.write(COORDS, _frame(date(2020, 1, 5), 10), ["b"])
+    assert store.coverage(COORDS, ["a"]) == (date(2020, 1, 1), date(2020, 1, 10))
+    assert store.coverage(COORDS, COLUMNS) == (date(2020, 1, 5), date(2020, 1, 10))
+
+
+def test_meta_without_columns_is_empty(tmp_path):
+    store = ArchiveStore(str(tmp_path))
+    store.write(COORDS, _frame(date(2020, 1, 1), 10), COLUMNS)
+    with open(os.path.join(tmp_path, ArchiveStore.location_key(COORDS), "meta.json"), "w") as fh:
+        json.dump({"start": "2020-01-01"}, fh)
+    assert store.coverage(COORDS, COLUMNS) is None
+
+
+def test_empty_frame_is_ignored(tmp_path):
+    store = ArchiveStore(str(tmp_path))
+    store.write(COORDS, _frame(date(2020, 1, 1), 0), COLUMNS)
+    assert store.coverage(COORDS, COLUMNS) is None
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,108 @@
+import random
+import pytest
+from rapidfuzz import fuzz as rf_fuzz
+from thefuzz import fuzz, process, utils
+from services.city_db import CityDatabase, DictCitySource, write_city_database
+from services.city_index import FoldedNameTable, SortedStringTable, TrigramIndex, fold_name
+from settings.cities import CITY_COORDINATES
+
+NAMES = list(CITY_COORDINATES)
+
+
+def _typos(count, seed=0):
+    """City names with a dropped, doubled or swapped character, plus a few unrelated strings."""
+    rng = random.Random(seed)
+    queries = ["xqzv", "Zakopne", "Gdanks", "warszawa", "los angeles", "ŁÓDŹ", "a", ""]
+    for name in rng.sample(NAMES, count):
+        pos = rng.randrange(len(name))
+        edit = rng.choice(["drop", "double", "swap"])
+        if edit == "drop":
+            queries.append(name[:pos] + name[pos + 1:])
+        elif edit == "double":
+            queries.append(name[:pos] + name[pos] + name[pos:])
+        else:
+            queries.append(name[:pos] + name[pos + 1:pos + 2] + name[pos:pos + 1] + name[pos + 2:])
+    return queries
+
+
+@pytest.fixture(scope="module")
+def index():
+    return TrigramIndex(NAMES)
+
+
+@pytest.mark.parametrize("query", _typos(60))
+def test_best_match_equals_full_scan(index, query):
+    expected = process.extractOne(query, dict(enumerate(NAMES)), scorer=fuzz.ratio)
+    assert index.best_match(query, NAMES, limit=20) == expected
+
+
+@pytest.mark.parametrize("query", _typos(30, seed=1))
+def test_reachable_keeps_every_name_that_can_reach_the_score(index, query):
+    text = utils.full_process(query)
+    scores = [rf_fuzz.ratio(text, utils.full_process(name)) for name in NAMES]
+    for threshold in (40.0, 60.0, 80.0):
+        reachable = set(index.reachable(query, threshold).tolist())
+        assert {idx for idx, score in enumerate(scores) if score >= threshold} <= reachable
+
+
+def test_saturated_bag_counts_skip_the_bag_bound():
+    names = ["a" * 300, "b" * 300]
+    index = TrigramIndex(names)
+    assert index.reachable("a" * 400, 80.0).tolist() == [0, 1]
+
+
+def test_candidates_prefer_shared_trigrams(index):
+    ids = index.candidates("Krakow", limit=5)
+    assert NAMES.index("Kraków") in ids and len(ids) <= 5
+    assert index.candidates("xqzv", limit=5) == []
+
+
+def test_sorted_string_table():
+    strings = sorted(["", "a", "kraków", "krakow", "łódź", "zzz"], key=lambda text: text.encode("utf-8"))
+    table = SortedStringTable.build(strings)
+    assert len(table) == len(strings)
+    for pos, text in enumerate(strings):
+        assert table.find(text) == pos
+    assert table.find("krak") is None and table.find("zzzz") is None
+    assert SortedStringTable.build([]).find("a") is None
+
+
+def test_folded_names():
+    table = FoldedNameTable(NAMES)
+    assert table.get("lodz") == NAMES.index("Łódź")
+    assert table.get("KRAKÓW") == NAMES.index("Kraków")
+    # The base form of a qualified name resolves to the first city listed under it
+    assert table.get("Adamow") == NAMES.index("Adamów (siedleckie)")
+    assert table.get("adamow zamojskie") == NAMES.index("Adamów (zamojskie)")
+    assert table.get("nowhere") is None
+    assert fold_name("Gdańsk-Wrzeszcz") == "gdansk wrzeszcz"
+
+
+def test_index_arrays_roundtrip(index):
+    restored = TrigramIndex.from_arrays(index.to_arrays())
+    for query in _typos(10, seed=2):
+        assert restored.best_match(query, NAMES, limit=20) == index.best_match(query, NAMES, limit=20)
+
+
+def test_compiled_database_roundtrip(tmp_path):
+    path = str(tmp_path / "cities.bin")
+    assert write_city_database(path, CITY_COORDINATES.items()) == len(NAMES)
+
+    database = CityDatabase(path)
+    source = DictCitySource(CITY_COORDINATES)
+    assert len(database) == len(source)
+    assert list(database.names()) == source.names()
+    for idx in (0, len(NAMES) // 2, len(NAMES) - 1):
+        assert database.coordinates(idx) == pytest.approx(source.coordinates(idx), abs=1e-5)
+
+    compiled = TrigramIndex.from_arrays(database.sections("trigram"))
+    assert compiled.best_match("Zakopne", database.names(), limit=20)[0] == "Zakopane"
+    assert FoldedNameTable.from_arrays(database.sections("folded")).get("gdansk") == NAMES.index("Gdańsk")
+    assert database.sections("missing") is None
+
+
+def test_empty_database_file_is_rejected(tmp_path):
+    path = tmp_path / "cities.bin"
+    path.write_bytes(b"")
+    with pytest.raises(ValueError):
+        len(CityDatabase(str(path)))
@@ -0,0 +1,78 @@
+import threading
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+import pytest
+from data import data_getter
+from data.frame_cache import FrameCache
+from settings import config
+
+
+@pytest.mark.parametrize("block, expected", [
+    ("day", (date(2020, 2, 10), date(2020, 3, 5))),
+    ("month", (date(2020, 2, 1), date(2020, 3, 31))),
+    ("year", (date(2020, 1, 1), date(2020, 12, 31)))
+])
+def test_align_to_blocks(monkeypatch, block, expected):
+    monkeypatch.setattr(config, "ARCHIVE_BLOCK", block)
+    assert data_getter._align_to_blocks(date(2020, 2, 10), date(2020, 3, 5)) == expected
+
+
+def test_align_to_blocks_never_passes_today(monkeypatch):
+    monkeypatch.setattr(config, "ARCHIVE_BLOCK", "year")
+    today = date.today()
+    first, last = data_getter._align_to_blocks(today - timedelta(days=3), today - timedelta(days=1))
+    assert first == (today - timedelta(days=3)).replace(month=1, day=1)
+    assert last == today
+
+    # A range already ending after today is kept as asked
+    assert data_getter._align_to_blocks(today, today + timedelta(days=5))[1] == today + timedelta(days=5)
+
+
+def test_concurrent_merges_keep_every_column(monkeypatch):
+    """Requests for different columns of one location, landing together, must not drop each other's columns."""
+    monkeypatch.setattr(data_getter, "frame_cache", FrameCache(max_bytes=1 << 26))
+    dates = pd.date_range("2024-01-01", periods=24, freq="h", tz="UTC")
+    columns = config.HOURLY_VARIABLES
+
+    for attempt in range(20):
+        key = ("race", attempt)
+        barrier = threading.Barrier(len(columns))
+
+        def merge(column):
+            frame = pd.DataFrame({"date": dates, column: np.arange(24, dtype=np.float32)})
+            barrier.wait()
+            data_getter._merge_into_cache(key, frame, 600)
+
+        threads = [threading.Thread(target=merge, args=(column,)) for column in columns]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        cached = data_getter.frame_cache.get(key)
+        assert list(cached.columns) == ["date"] + columns
+
+
+def test_merged_entry_expires_with_the_older_part(monkeypatch):
+    monkeypatch.setattr(data_getter, "frame_cache", FrameCache(max_bytes=1 << 26))
+    dates = pd.date_range("2024-01-01", periods=24, freq="h", tz="UTC")
+    first, second = config.HOURLY_VARIABLES[:2]
+
+    data_getter._merge_into_cache("k", pd.DataFrame({"date": dates, first: np.zeros(24)}), 100)
+    data_getter._merge_into_cache("k", pd.DataFrame({"date": dates, second: np.ones(24)}), 1000)
+
+    assert data_getter.frame_cache.expires_in("k") <= 100
+    assert list(data_getter.frame_cache.get("k").columns) == ["date", first, second]
+
+
+def test_merge_replaces_entries_for_other_rows(monkeypatch):
+    monkeypatch.setattr(data_getter, "frame_cache", FrameCache(max_bytes=1 << 26))
+    first, second = config.HOURLY_VARIABLES[:2]
+    old = pd.date_range("2024-01-01", periods=24, freq="h", tz="UTC")
+    new = pd.date_range("2024-01-02", periods=24, freq="h", tz="UTC")
+
+    data_getter._merge_into_cache("k", pd.DataFrame({"date": old, first: np.zeros(24)}), 100)
+    data_getter._merge_into_cache("k", pd.DataFrame({"date": new, second: np.ones(24)}), 1000)
+
+    assert list(data_getter.frame_cache.get("k").columns) == ["date", second]
@@ -0,0 +1,139 @@
+import pandas as pd
+import pytest
+from data import frame_cache as frame_cache_module
+from data.frame_cache import FrameCache
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(frame_cache_module.time, "monotonic", clock)
+    return clock
+
+
+def _frame(rows=10, **columns):
+    return pd.DataFrame({"x": range(rows), **columns})
+
+
+def _nbytes(frame):
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+def test_lookups_return_copies(clock):
+    cache = FrameCache(max_bytes=1 << 20)
+    cache.put("k", _frame(), ttl=60)
+
+    first = cache.get("k")
+    first.loc[0, "x"] = -1
+    assert cache.get("k").loc[0, "x"] == 0
+
+
+def test_ttl_and_stale_lookups(clock):
+    cache = FrameCache(max_bytes=1 << 20, stale_retention=300)
+    cache.put("k", _frame(), ttl=60)
+
+    clock.now += 59
+    frame, stale = cache.lookup("k")
+    assert frame is not None and not stale
+    assert cache.expires_in("k") == pytest.approx(1)
+
+    clock.now += 10
+    assert cache.get("k") is None
+    frame, stale = cache.lookup("k", max_stale=30)
+    assert frame is not None and stale
+
+    clock.now += 400
+    assert cache.lookup("k", max_stale=1000) == (None, False)
+    assert cache.expires_in("k") is None
+
+
+def test_negative_ttl_never_expires_and_zero_is_not_stored(clock):
+    cache = FrameCache(max_bytes=1 << 20)
+    cache.put("forever", _frame(), ttl=-1)
+    cache.put("never", _frame(), ttl=0)
+
+    clock.now += 10 ** 9
+    assert cache.get("forever") is not None
+    assert cache.expires_in("never") is None
+
+
+def test_lru_eviction_by_bytes(clock):
+    removed = []
+    size = _nbytes(_frame())
+    cache = FrameCache(max_bytes=2 * size, on_remove=removed.append)
+
+    cache.put("a", _frame(), ttl=60)
+    cache.put("b", _frame(), ttl=60)
+    cache.get("a")
+    cache.put("c", _frame(), ttl=60)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert removed == ["b"]
+    assert cache.stats()["evictions"] == 1
+    assert cache.bytes_held == 2 * size
+
+
+def test_oversized_frames_are_not_stored(clock):
+    cache = FrameCache(max_bytes=_nbytes(_frame()) - 1)
+    cache.put("k", _frame(), ttl=60)
+    assert cache.get("k") is None and cache.bytes_held == 0
+
+
+def test_replacing_an_entry_does_not_notify(clock):
+    removed = []
+    cache = FrameCache(max_bytes=1 << 20, on_remove=removed.append)
+    cache.put("k", _frame(), ttl=60)
+    cache.put("k", _frame(rows=20), ttl=60)
+
+    assert removed == []
+    assert len(cache.get("k")) == 20
+    assert cache.bytes_held == _nbytes(_frame(rows=20))
+
+    cache.clear()
+    assert removed == ["k"] and cache.bytes_held == 0
+
+
+def test_merge_sees_only_fresh_entries(clock):
+    cache = FrameCache(max_bytes=1 << 20, stale_retention=300)
+    seen = []
+
+    def combine(existing, remaining, frame, ttl):
+        seen.append((existing is not None, remaining))
+        if existing is not None:
+            frame = pd.concat([frame, existing[["y"]]], axis=1)
+        return frame, min(ttl, remaining) if existing is not None else ttl
+
+    cache.put("k", _frame(y=range(10)), ttl=60)
+    clock.now += 20
+    merged = cache.merge("k", _frame(z=range(10)), 100, combine)
+
+    assert list(merged.columns) == ["x", "z", "y"]
+    assert seen == [(True, pytest.approx(40))]
+    assert cache.expires_in("k") == pytest.approx(40)
+
+    clock.now += 50
+    cache.merge("k", _frame(), 100, combine)
+    assert seen[-1][0] is False
+
+
+def test_stats(clock):
+    cache = FrameCache(max_bytes=1 << 20, stale_retention=60)
+    cache.put("k", _frame(), ttl=10)
+    cache.get("k")
+    cache.get("missing")
+    clock.now += 20
+    cache.lookup("k", max_stale=30)
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["stale_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["hit_ratio"] == pytest.approx(2 / 3, abs=1e-4)
+    assert stats["entries"] == 1
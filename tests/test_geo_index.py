@@ -0,0 +1,98 @@
+import math
+import numpy as np
+import pytest
+from services.geo_index import GeoGrid, haversine_km_array
+
+
+def _points(count, seed=0, lat_range=(-89.0, 89.0), lon_range=(-180.0, 180.0)):
+    rng = np.random.default_rng(seed)
+    return np.column_stack((rng.uniform(*lat_range, count), rng.uniform(*lon_range, count))).tolist()
+
+
+def _brute_force(points, lat, lon):
+    array = np.asarray(points)
+    return haversine_km_array(lat, lon, array[:, 0], array[:, 1])
+
+
+QUERIES = [(50.06, 19.94), (0.0, 0.0), (89.9, 10.0), (-89.9, -170.0), (10.0, 179.99), (10.0, -179.99), (-33.9, 151.2)]
+
+
+@pytest.fixture(scope="module")
+def grid_and_points():
+    # Dense where the cities are, sparse elsewhere, like a real gazetteer
+    points = _points(3000, seed=1, lat_range=(49.0, 55.0), lon_range=(14.0, 24.5)) + _points(500, seed=2)
+    return GeoGrid(points, cell_deg=0.5), points
+
+
+@pytest.mark.parametrize("lat, lon", QUERIES)
+@pytest.mark.parametrize("k", [1, 5])
+def test_nearest_matches_brute_force(grid_and_points, lat, lon, k):
+    grid, points = grid_and_points
+    distances = np.sort(_brute_force(points, lat, lon))[:k]
+    found = grid.nearest(lat, lon, k)
+    assert [dist for _, dist in found] == pytest.approx(distances.tolist())
+
+
+@pytest.mark.parametrize("lat, lon", QUERIES)
+@pytest.mark.parametrize("radius_km", [0.0, 25.0, 400.0])
+def test_within_matches_brute_force(grid_and_points, lat, lon, radius_km):
+    grid, points = grid_and_points
+    distances = _brute_force(points, lat, lon)
+    expected = sorted(int(idx) for idx in np.flatnonzero(distances <= radius_km))
+    found = grid.within(lat, lon, radius_km)
+    assert sorted(idx for idx, _ in found) == expected
+    assert [dist for _, dist in found] == sorted(dist for _, dist in found)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_ring_bound_never_exceeds_true_distance(seed):
+    points = _points(2000, seed=seed)
+    grid = GeoGrid(points, cell_deg=2.0)
+    rng = np.random.default_rng(100 + seed)
+    cells = np.floor(np.asarray(points) / grid.cell_deg).astype(int)
+
+    for lat, lon in zip(rng.uniform(-89, 89, 20), rng.uniform(-180, 180, 20)):
+        centers = grid._centers(lat, lon)
+        row = centers[0][0]
+        distances = _brute_force(points, lat, lon)
+        # Ring of every point around the nearer of the query cell and its image across the antimeridian
+        rings = np.min([
+            np.maximum(np.abs(cells[:, 0] - center_row), np.abs(cells[:, 1] - center_col))
+            for center_row, center_col in centers
+        ], axis=0)
+        for r in range(6):
+            outside = distances[rings > r]
+            if len(outside):
+                assert grid._outside_bound_km(row, r) <= outside.min() + 1e-9
+
+
+def test_arrays_roundtrip(grid_and_points):
+    grid, _ = grid_and_points
+    restored = GeoGrid.from_arrays(grid.to_arrays())
+    for lat, lon in QUERIES:
+        assert restored.nearest(lat, lon, 3) == grid.nearest(lat, lon, 3)
+        assert restored.within(lat, lon, 300.0) == grid.within(lat, lon, 300.0)
+
+
+def test_empty_grid():
+    grid = GeoGrid([], cell_deg=1.0)
+    assert grid.nearest(50.0, 20.0) == []
+    assert grid.within(50.0, 20.0, 100.0) == []
+
+
+def test_single_point():
+    grid = GeoGrid([[50.0, 20.0]], cell_deg=1.0)
+    (idx, dist), = grid.nearest(-50.0, -160.0)
+    assert idx == 0 and dist == pytest.approx(_brute_force([[50.0, 20.0]], -50.0, -160.0)[0])
+    assert math.isclose(grid.nearest(50.0, 20.0)[0][1], 0.0, abs_tol=1e-9)
+
+
+def test_nearest_across_the_antimeridian():
+    # Dense on both sides of the seam, so the ring search runs instead of the brute-force fallback
+    points = _points(4000, seed=3, lat_range=(-20.0, 20.0), lon_range=(170.0, 180.0))
+    points += _points(4000, seed=4, lat_range=(-20.0, 20.0), lon_range=(-180.0, -170.0))
+    points.append([0.0, -179.999])
+    grid = GeoGrid(points, cell_deg=0.25)
+
+    assert grid.nearest(0.0, 179.999)[0][0] == len(points) - 1
+    assert len(points) - 1 in [idx for idx, _ in grid.within(0.0, 179.999, 1.0)]
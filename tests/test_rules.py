@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+from services.rules import RuleSet, _run_reaches
+from settings import config
+
+SPELL = {"hot": {"col": "t", "op": ">", "val": 30.0, "min_days": 3}}
+
+
+def _frame(**columns):
+    days = len(next(iter(columns.values())))
+    return pd.DataFrame({**columns, "date": pd.date_range("2024-07-01", periods=days, freq="D", tz="UTC")})
+
+
+def _reference_spells(mask, min_days):
+    """Index of the day each run reaches `min_days`, by walking the runs."""
+    marks, run = [], 0
+    for idx, hit in enumerate(mask):
+        run = run + 1 if hit else 0
+        if run == min_days:
+            marks.append(idx)
+    return marks
+
+
+def test_run_reaches_marks_each_run_once():
+    mask = np.array([1, 1, 1, 1, 1, 0, 1, 1, 0, 1, 1, 1], dtype=bool)
+    assert np.flatnonzero(_run_reaches(mask, 3)).tolist() == [2, 11]
+
+
+@pytest.mark.parametrize("min_days", [2, 3, 5])
+def test_run_reaches_matches_reference(min_days):
+    rng = np.random.default_rng(min_days)
+    mask = rng.random(2000) < 0.6
+    assert np.flatnonzero(_run_reaches(mask, min_days)).tolist() == _reference_spells(mask, min_days)
+
+
+def test_spell_counted_once_however_long():
+    rules = RuleSet(SPELL)
+    masks = rules.evaluate(_frame(t=[31.0] * 10))
+    assert np.flatnonzero(masks["hot"]).tolist() == [2]
+
+
+def test_lookback_keeps_blocks_consistent():
+    rules = RuleSet(SPELL)
+    rng = np.random.default_rng(0)
+    frame = _frame(t=np.where(rng.random(400) < 0.7, 32.0, 20.0))
+    full = rules.evaluate(frame)["hot"]
+
+    lookback = rules.lookback_days
+    for start in range(lookback, 60):
+        block = rules.evaluate(frame.iloc[start - lookback:].reset_index(drop=True))["hot"]
+        assert np.array_equal(block[lookback:], full[start:])
+
+
+def test_lookback_days():
+    assert RuleSet(SPELL).lookback_days == 3
+    assert RuleSet({"rain": config.SEARCH_CONFIG["rain"]}).lookback_days == 0
+
+
+def test_missing_values_never_match():
+    rules = RuleSet({"dry_heat": config.SEARCH_CONFIG["dry_heat"], "frost": config.SEARCH_CONFIG["frost"]})
+    frame = _frame(
+        temperature_2m_max=[35.0, 35.0, np.nan],
+        rain_sum=[0.0, np.nan, 0.0],
+        temperature_2m_min=[np.nan, -20.0, 5.0]
+    )
+    masks = rules.evaluate(frame)
+    assert masks["dry_heat"].tolist() == [True, False, False]
+    assert masks["frost"].tolist() == [False, True, False]
+
+
+def test_shared_predicates_and_columns():
+    rules = RuleSet(config.SEARCH_CONFIG)
+    assert len(rules._predicates) < sum(len(cfg.get("all", [cfg])) for cfg in config.SEARCH_CONFIG.values())
+    assert "rain_sum" in rules.columns and "temperature_2m_max" in rules.columns
+
+
+def test_invalid_rules_raise():
+    with pytest.raises(ValueError):
+        RuleSet({"bad": {"col": "t", "op": "!=", "val": 1}})
+    with pytest.raises(ValueError):
+        RuleSet({"empty": {"all": []}})
@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+import pytest
+from data.single_flight import AsyncSingleFlight, SingleFlight, request_key
+
+
+def test_request_key_ignores_parameter_order():
+    a = request_key("u", {"latitude": 1.0, "daily": ["x", "y"]})
+    b = request_key("u", {"daily": ("x", "y"), "latitude": 1.0})
+    assert a == b and hash(a) == hash(b)
+
+
+def _run_concurrently(fn, callers=8):
+    barrier = threading.Barrier(callers)
+    results, errors = [], []
+
+    def call():
+        barrier.wait()
+        try:
+            results.append(fn())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_concurrent_calls_run_once():
+    flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return object()
+
+    results, errors = _run_concurrently(lambda: flight.do("k", fetch))
+
+    assert not errors and len(calls) == 1
+    assert len({id(result) for result, _ in results}) == 1
+    assert all(shared for _, shared in results)
+    assert flight.stats == {"executed": 1, "coalesced": 7}
+
+
+def test_errors_are_shared_with_waiters():
+    flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        raise RuntimeError("upstream down")
+
+    results, errors = _run_concurrently(lambda: flight.do("k", fetch))
+
+    assert not results and len(calls) == 1
+    assert len(errors) == 8 and len({id(error) for error in errors}) == 1
+    # The key is released, so the next call runs again
+    with pytest.raises(RuntimeError):
+        flight.do("k", fetch)
+    assert len(calls) == 2
+
+
+def test_sequential_calls_are_not_shared():
+    flight = SingleFlight()
+    assert flight.do("k", lambda: 1) == (1, False)
+    assert flight.do("k", lambda: 2) == (2, False)
+
+
+def test_async_calls_run_once():
+    async def main():
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "frame"
+
+        results = await asyncio.gather(*(flight.do("k", fetch) for _ in range(5)))
+        return calls, results, flight
+
+    calls, results, flight = asyncio.run(main())
+    assert len(calls) == 1
+    assert results == [("frame", True)] * 5
+    assert flight.stats == {"executed": 1, "coalesced": 4}
+    assert not flight._calls
+
+
+def test_async_errors_are_shared():
+    async def main():
+        flight = AsyncSingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        return await asyncio.gather(*(flight.do("k", fetch) for _ in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(main())
+    assert all(isinstance(error, RuntimeError) for error in errors)
+
+
+def test_async_leader_cancellation_spares_waiters():
+    async def main():
+        flight = AsyncSingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "frame"
+
+        leader = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        result = await waiter
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        await asyncio.sleep(0)
+        return result, flight
+
+    result, flight = asyncio.run(main())
+    assert result == ("frame", True)
+    assert not flight._calls
+
+
+def test_async_waiter_cancellation_spares_leader():
+    async def main():
+        flight = AsyncSingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "frame"
+
+        leader = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        return await leader
+
+    assert asyncio.run(main()) == ("frame", True)
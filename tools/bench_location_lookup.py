@@ -0,0 +1,158 @@
+"""
+Benchmark: trigram-indexed fuzzy city lookup vs. the full thefuzz scan.
+
+Queries mix typo'd real names with made-up words and foreign exonyms that are
+not in the table, where the trigram prefilter is most likely to miss the best
+match. With --check, the run fails unless the indexed lookup and the batch
+score matrix pick the same name as the full scan for every query.
+
+Usage (from the repository root):
+    python -m tools.bench_location_lookup [--queries 200] [--sizes 2000 50000 500000] [--check]
+"""
+import argparse
+import random
+import sys
+import time
+import numpy as np
+from typing import List, Optional
+from rapidfuzz import process as rf_process, fuzz as rf_fuzz
+from rapidfuzz.utils import default_process
+from thefuzz import process, fuzz
+from settings.cities import CITY_COORDINATES
+from settings import config
+from services.city_index import TrigramIndex
+
+SYLLABLES = ["ka", "no", "wo", "ró", "sz", "ki", "ce", "ła", "dą", "brz", "ów", "ice", "my", "le", "pi"]
+
+# Names users type that are not in the table: exonyms, foreign cities, fragments
+FOREIGN_QUERIES = [
+    "Breslau", "Posen", "Danzig", "Krakau", "Warschau", "Kattowitz", "Stettin", "Lodz city",
+    "New York", "Paris", "Berlin", "Lemberg", "Wilno", "K", "St", "xqzv"
+]
+LETTERS = "abcdefghijklmnoprstuwyząćęłńóśźż"
+
+
+def build_names(size: int, rng: random.Random) -> List[str]:
+    """Pads the bundled city list with synthetic, city-like names up to `size`."""
+    base = list(CITY_COORDINATES.keys())
+    names = base[:size]
+    seen = set(names)
+
+    while len(names) < size:
+        stem = rng.choice(base).split(" (")[0]
+        name = f"{stem} {''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).capitalize()}"
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+
+    return names
+
+
+def misspell(name: str, rng: random.Random, edits: int) -> str:
+    """Applies `edits` random substitutions, deletions or insertions."""
+    for _ in range(edits):
+        pos = rng.randrange(len(name) + 1)
+        op = rng.random()
+        if op < 0.4 and pos < len(name):
+            name = name[:pos] + rng.choice(LETTERS) + name[pos + 1:]
+        elif op < 0.7 and pos < len(name) and len(name) > 1:
+            name = name[:pos] + name[pos + 1:]
+        else:
+            name = name[:pos] + rng.choice(LETTERS) + name[pos:]
+    return name
+
+
+def make_query(name: str, rng: random.Random) -> str:
+    """Produces a user query: lowercased, typo'd, truncated, heavily misspelled or made up."""
+    variant = rng.random()
+    if variant < 0.1:
+        return rng.choice(FOREIGN_QUERIES)
+    if variant < 0.2:
+        return "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).capitalize()
+    if variant < 0.35:
+        return misspell(name, rng, rng.randint(2, 3))
+    if variant < 0.45:
+        return name.lower()
+    if variant < 0.6 and len(name) > 3:
+        pos = rng.randrange(len(name))
+        return name[:pos] + name[pos + 1:]
+    if variant < 0.8 and len(name) > 3:
+        pos = rng.randrange(len(name) - 1)
+        return name[:pos] + name[pos + 1] + name[pos] + name[pos + 2:]
+    return name.split(" ")[0]
+
+
+def scan_lookup(query: str, names: List[str]) -> Optional[str]:
+    match = process.extractOne(query, names, scorer=fuzz.ratio)
+    return match[0] if match and match[1] >= config.FUZZY_MATCH_THRESHOLD else None
+
+
+def indexed_lookup(query: str, names: List[str], index: TrigramIndex) -> Optional[str]:
+    match = index.best_match(query, names, config.FUZZY_CANDIDATE_LIMIT)
+    return match[0] if match and match[1] >= config.FUZZY_MATCH_THRESHOLD else None
+
+
+def batch_lookup(queries: List[str], names: List[str]) -> List[Optional[str]]:
+    scores = rf_process.cdist(queries, names, scorer=rf_fuzz.ratio, processor=default_process, dtype=np.float64)
+    best_ids = scores.argmax(axis=1)
+    best_scores = np.rint(scores[np.arange(len(queries)), best_ids])
+    return [
+        names[best_id] if best_score >= config.FUZZY_MATCH_THRESHOLD else None
+        for best_id, best_score in zip(best_ids, best_scores)
+    ]
+
+
+def run(size: int, n_queries: int, seed: int, check: bool) -> bool:
+    rng = random.Random(seed)
+    names = build_names(size, rng)
+
+    start = time.perf_counter()
+    index = TrigramIndex(names)
+    build_s = time.perf_counter() - start
+
+    queries = [make_query(rng.choice(names), rng) for _ in range(n_queries)]
+
+    start = time.perf_counter()
+    expected = [scan_lookup(q, names) for q in queries]
+    scan_ms = (time.perf_counter() - start) * 1000 / n_queries
+
+    start = time.perf_counter()
+    actual = [indexed_lookup(q, names, index) for q in queries]
+    index_ms = (time.perf_counter() - start) * 1000 / n_queries
+
+    agreement = sum(e == a for e, a in zip(expected, actual)) / n_queries * 100
+
+    print(
+        f"{size:>8} names | build {build_s:6.2f}s | scan {scan_ms:8.3f} ms/q | "
+        f"index {index_ms:8.3f} ms/q | speedup {scan_ms / index_ms:6.1f}x | same match {agreement:5.1f}%"
+    )
+
+    if not check:
+        return True
+
+    batched = batch_lookup(queries, names)
+    mismatches = [
+        (query, scan, indexed, batch)
+        for query, scan, indexed, batch in zip(queries, expected, actual, batched)
+        if not scan == indexed == batch
+    ]
+    for query, scan, indexed, batch in mismatches:
+        print(f"  MISMATCH {query!r}: scan={scan!r} index={indexed!r} batch={batch!r}")
+    return not mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fuzzy city lookup benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 50000, 500000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--check", action="store_true", help="Fail unless all lookups agree with the full scan")
+    args = parser.parse_args()
+
+    ok = all([run(size, args.queries, args.seed, args.check) for size in args.sizes])
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
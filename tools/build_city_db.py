@@ -0,0 +1,75 @@
+"""
+Compiles the city list, with its prebuilt lookup indexes, into the memory-mappable city database.
+
+Usage (from the repository root):
+    python -m tools.build_city_db                          # bundled settings/cities.py
+    python -m tools.build_city_db --geonames cities500.txt  # GeoNames dump (tab separated)
+    python -m tools.build_city_db --csv extra.csv -o other.bin
+
+LocationFinder picks up the file at config.CITY_DB_PATH automatically.
+"""
+import argparse
+import csv
+import os
+import time
+from typing import Iterator, List, Tuple
+from settings import config
+from services.city_db import write_city_database
+
+Entry = Tuple[str, List[float]]
+
+
+def bundled_entries() -> Iterator[Entry]:
+    from settings.cities import CITY_COORDINATES
+    for name, coords in CITY_COORDINATES.items():
+        yield name, coords
+
+
+def geonames_entries(path: str) -> Iterator[Entry]:
+    """Reads a GeoNames 'cities*.txt' dump (name in column 2, lat/lon in columns 5-6)."""
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) > 5:
+                yield fields[1], [float(fields[4]), float(fields[5])]
+
+
+def csv_entries(path: str) -> Iterator[Entry]:
+    """Reads a 'name,lat,lon' CSV file (a header row is skipped if present)."""
+    with open(path, encoding="utf-8", newline="") as fh:
+        for row in csv.reader(fh):
+            try:
+                yield row[0], [float(row[1]), float(row[2])]
+            except (IndexError, ValueError):
+                continue
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the binary city database")
+    parser.add_argument("--geonames", action="append", default=[], help="GeoNames dump to include.")
+    parser.add_argument("--csv", action="append", default=[], help="name,lat,lon CSV file to include.")
+    parser.add_argument("--no-bundled", action="store_true", help="Skip settings/cities.py.")
+    parser.add_argument("-o", "--output", default=config.CITY_DB_PATH, help="Output file.")
+    args = parser.parse_args()
+
+    def entries() -> Iterator[Entry]:
+        # Earlier sources win on duplicate names
+        seen = set()
+        sources = [] if args.no_bundled else [bundled_entries()]
+        sources += [geonames_entries(path) for path in args.geonames]
+        sources += [csv_entries(path) for path in args.csv]
+        for source in sources:
+            for name, coords in source:
+                if name not in seen:
+                    seen.add(name)
+                    yield name, coords
+
+    start = time.perf_counter()
+    count = write_city_database(args.output, entries())
+    elapsed = time.perf_counter() - start
+
+    print(f"Wrote {count} cities to {args.output} ({os.path.getsize(args.output)} bytes) in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
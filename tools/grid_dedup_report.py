@@ -0,0 +1,22 @@
+"""
+Reports how much grid canonicalization deduplicates the bundled city list.
+
+Usage (from the repository root):
+    python -m tools.grid_dedup_report
+"""
+from settings import config
+from settings.cities import CITY_COORDINATES
+from data.grid import dedup_ratio, grid_resolution
+
+
+def main() -> None:
+    for label, url in (("forecast", config.OPEN_METEO_FORECAST_URL), ("archive", config.OPEN_METEO_ARCHIVE_URL)):
+        total, cells, ratio = dedup_ratio(CITY_COORDINATES.values(), url)
+        print(
+            f"{label:<9} grid {grid_resolution(url):.4f}° | {total} cities -> {cells} cells | "
+            f"{ratio:.2f} cities/cell | {100 * (1 - cells / total):.1f}% fewer fetch keys"
+        )
+
+
+if __name__ == "__main__":
+    main()